@@ -11,12 +11,13 @@ the Free Software Foundation, either version 3 of the License, or
 (at your option) any later version.
 """
 
+import atexit
 import os
 import uuid
 import ssl
 import base64
-import threading
-import time
+import signal
+import sys
 import sqlite3
 from datetime import datetime, timedelta
 from flask import (
@@ -26,13 +27,18 @@ from flask import (
     redirect,
     url_for,
     flash,
+    g,
+    abort,
+    jsonify,
     send_from_directory,
 )
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 from models import MediaInfo as MediaInfoModel
-from mediainfo_parser import MediaInfoParser
+from mediainfo_parser import MediaInfoParser, OUTPUT_EXTENSIONS
 from database import Database
+from scheduler import ExpiryScheduler
+from storage import UploadStore
 
 load_dotenv()
 
@@ -42,8 +48,10 @@ class MediaInfoShare:
     def __init__(self):
         self.app = Flask(__name__)
         self.db = Database(os.getenv("DB_PATH"))
+        self.db.sync_id_filter()
         self.parser = MediaInfoParser()
         self._setup_config()
+        self._setup_db_connection()
         self._setup_routes()
         self._setup_context_processors()
         self._setup_cleanup_task()
@@ -72,6 +80,8 @@ class MediaInfoShare:
             UPLOAD_FOLDER=os.getenv("UPLOAD_FOLDER", "static/media"),
             MAX_CONTENT_LENGTH=int(os.getenv("MAX_CONTENT_LENGTH", "1048576")),
             ALLOWED_EXTENSIONS=os.getenv("ALLOWED_EXTENSIONS", "txt").split(","),
+            FULL_FIDELITY=os.getenv("FULL_FIDELITY", "1") == "1",
+            METRICS_ENABLED=os.getenv("METRICS_ENABLED", "0") == "1",
             SECRET_KEY=os.getenv("SECRET_KEY", os.urandom(24).hex()),
             ENCRYPTION_KEY=key,
             DONATION_ADDRESSES={
@@ -84,6 +94,23 @@ class MediaInfoShare:
 
         self.cipher = Fernet(self.app.config["ENCRYPTION_KEY"].encode())
         os.makedirs(self.app.config["UPLOAD_FOLDER"], exist_ok=True)
+        self.uploads = UploadStore(self.app.config["UPLOAD_FOLDER"])
+
+    def _setup_db_connection(self):
+        @self.app.before_request
+        def bind_db_connection():
+            # Static files and unknown URLs never touch the database
+            if request.endpoint in (None, "static"):
+                return
+            g.db_conn = self.db.bind_connection()
+
+        @self.app.teardown_appcontext
+        def release_db_connection(_error):
+            conn = g.pop("db_conn", None)
+            if conn is not None:
+                self.db.release_connection(conn)
+
+        atexit.register(self.db.close)
 
     def _setup_routes(self):
         @self.app.route("/", methods=["GET", "POST"])
@@ -94,33 +121,44 @@ class MediaInfoShare:
                     flash("Please provide MediaInfo output.")
                     return redirect(url_for("index"))
 
-                filename = f"{uuid.uuid4().hex}_mediainfo.txt"
-                file_path = os.path.join(self.app.config["UPLOAD_FOLDER"], filename)
-
                 try:
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(mediainfo_text)
-
-                    parsed_info = self.parser.parse_file(file_path)
-
                     expiration_hours = int(request.form.get("expiration", "0"))
                     expiration = None
                     if expiration_hours > 0:
                         expiration = datetime.now() + timedelta(hours=expiration_hours)
 
-                    media = MediaInfoModel(
-                        media_id=str(uuid.uuid4()),
-                        filename=filename,
-                        original_filename="MediaInfo Output",
-                        uploaded_on=datetime.now(),
-                        expiration=expiration,
-                        raw_output=mediainfo_text,
-                        parsed_info=parsed_info
+                    output_format = self.parser.detect_format(mediainfo_text)
+                    parsed_info = None
+                    if request.form.get("batch") == "1":
+                        records = list(
+                            self.parser.iter_documents(
+                                mediainfo_text,
+                                output_format,
+                                full=self.app.config["FULL_FIDELITY"],
+                            )
+                        )
+                        if len(records) > 1:
+                            return self._save_collection(
+                                records, expiration, output_format
+                            )
+                        if records:
+                            parsed_info = records[0][1]
+
+                    if parsed_info is None:
+                        parsed_info = self.parser.parse_auto(
+                            mediainfo_text,
+                            output_format,
+                            full=self.app.config["FULL_FIDELITY"],
+                        )
+                    media = self._store_media(
+                        mediainfo_text, parsed_info, expiration, output_format
                     )
 
                     if not self.db.save_media_info(media):
+                        self._discard_files([media])
                         flash("Error saving media information.")
                         return redirect(url_for("index"))
+                    self.scheduler.notify(expiration)
 
                     return redirect(url_for("preview", media_id=media.media_id))
                 except (OSError, IOError) as e:
@@ -135,15 +173,25 @@ class MediaInfoShare:
 
             return render_template("index.html")
 
-        @self.app.route("/share/<media_id>", methods=["GET", "POST"])
-        def share(media_id):
-            media = self.db.get_media_info(media_id)
-            if not media:
+        @self.app.route("/collection/<collection_id>", methods=["GET"])
+        def collection(collection_id):
+            now = datetime.now()
+            medias = [
+                media for media in self.db.get_collection(collection_id)
+                if not media.expiration or now <= media.expiration
+            ]
+            if not medias:
                 flash("Invalid or expired link.")
                 return redirect(url_for("index"))
 
-            if media.expiration and datetime.now() > media.expiration:
-                flash("This link has expired.")
+            return render_template(
+                "collection.html", medias=medias, collection_id=collection_id
+            )
+
+        @self.app.route("/share/<media_id>", methods=["GET", "POST"])
+        def share(media_id):
+            media = self._get_live_media(media_id)
+            if not media:
                 return redirect(url_for("index"))
 
             if media.password:
@@ -164,26 +212,16 @@ class MediaInfoShare:
 
         @self.app.route("/preview/<media_id>", methods=["GET"])
         def preview(media_id):
-            media = self.db.get_media_info(media_id)
+            media = self._get_live_media(media_id)
             if not media:
-                flash("Invalid or expired link.")
-                return redirect(url_for("index"))
-
-            if media.expiration and datetime.now() > media.expiration:
-                flash("This link has expired.")
                 return redirect(url_for("index"))
 
             return render_template("preview.html", media_info=media, media_id=media_id)
 
         @self.app.route("/download/<media_id>", methods=["GET", "POST"])
         def download(media_id):
-            media = self.db.get_media_info(media_id)
+            media = self._get_live_media(media_id)
             if not media:
-                flash("Invalid or expired link.")
-                return redirect(url_for("index"))
-
-            if media.expiration and datetime.now() > media.expiration:
-                flash("This link has expired.")
                 return redirect(url_for("index"))
 
             if media.password:
@@ -198,19 +236,95 @@ class MediaInfoShare:
                 else:
                     return render_template("share.html", media_info=None, error=False)
 
-            file_path = os.path.join(self.app.config["UPLOAD_FOLDER"], media.filename)
-            if not os.path.exists(file_path):
+            file_path = self.uploads.locate(media.filename)
+            if file_path is None:
                 flash("File not found.")
                 return redirect(url_for("index"))
 
             return send_from_directory(
-                self.app.config["UPLOAD_FOLDER"], media.filename, as_attachment=True
+                self.app.config["UPLOAD_FOLDER"],
+                os.path.relpath(file_path, self.app.config["UPLOAD_FOLDER"]),
+                as_attachment=True,
             )
 
         @self.app.route("/donate")
         def donate():
             return render_template("donate.html")
 
+        @self.app.route("/metrics")
+        def metrics():
+            if not self.app.config["METRICS_ENABLED"]:
+                abort(404)
+            return jsonify(self.db.metrics())
+
+    def _get_live_media(self, media_id):
+        """Load an unexpired entry, or flash why the link cannot be shown
+
+        An entry found expired is deleted right away instead of waiting for
+        the next cleanup pass.
+        """
+        media = self.db.get_media_info(media_id)
+        if not media:
+            flash("Invalid or expired link.")
+            return None
+
+        if media.expiration and datetime.now() > media.expiration:
+            self.db.delete_media(media_id)
+            flash("This link has expired.")
+            return None
+
+        return media
+
+    def _store_media(
+        self, raw_output, parsed_info, expiration, output_format="text", collection_id=None
+    ):
+        """Write an upload to UPLOAD_FOLDER and build its MediaInfo model"""
+        extension = OUTPUT_EXTENSIONS.get(output_format, "txt")
+        filename = f"{uuid.uuid4().hex}_mediainfo.{extension}"
+        self.uploads.write(filename, raw_output, fsync=self.db.fsync_uploads)
+
+        return MediaInfoModel(
+            media_id=str(uuid.uuid4()),
+            filename=filename,
+            original_filename="MediaInfo Output",
+            uploaded_on=datetime.now(),
+            expiration=expiration,
+            raw_output=raw_output,
+            parsed_info=parsed_info,
+            collection_id=collection_id,
+        )
+
+    def _save_collection(self, records, expiration, output_format="text"):
+        """Store each file of a multi-file dump as its own entry"""
+        collection_id = str(uuid.uuid4())
+        medias = []
+        try:
+            for raw_output, parsed_info in records:
+                medias.append(
+                    self._store_media(
+                        raw_output, parsed_info, expiration, output_format, collection_id
+                    )
+                )
+        except OSError:
+            self._discard_files(medias)
+            raise
+
+        if not self.db.save_media_infos(medias):
+            self._discard_files(medias)
+            flash("Error saving media information.")
+            return redirect(url_for("index"))
+        self.scheduler.notify(expiration)
+
+        return redirect(url_for("collection", collection_id=collection_id))
+
+    def _discard_files(self, medias):
+        """Remove the upload files of entries that could not be saved"""
+        for media in medias:
+            try:
+                self.uploads.remove(media.filename)
+            except OSError as e:
+                print(f"Error deleting file {media.filename}: {str(e)}")
+
     def _setup_context_processors(self):
         @self.app.context_processor
         def inject_datetime():
@@ -235,22 +349,14 @@ class MediaInfoShare:
         )
 
     def _setup_cleanup_task(self):
-        def cleanup_task():
-            while True:
-                try:
-                    expired_count = self.db.delete_expired_media()
-                    if expired_count > 0:
-                        print(f"Cleaned up {expired_count} expired media entries")
-                except (OSError, IOError) as e:
-                    print(f"File system error during cleanup: {str(e)}")
-                except sqlite3.Error as e:
-                    print(f"Database error during cleanup: {str(e)}")
-                except RuntimeError as e:
-                    print(f"Processing error during cleanup: {str(e)}")
-                time.sleep(3600)
-
-        cleanup_thread = threading.Thread(target=cleanup_task, daemon=True)
-        cleanup_thread.start()
+        self.scheduler = ExpiryScheduler(
+            self.db,
+            max_sleep=float(os.getenv("EXPIRY_MAX_SLEEP", "3600")),
+            jitter=float(os.getenv("EXPIRY_JITTER", "5")),
+            lease_ttl=float(os.getenv("CLEANUP_LEASE_TTL", "30")),
+        )
+        self.scheduler.start()
+        atexit.register(self.scheduler.stop)
 
     def _setup_error_handlers(self):
         @self.app.errorhandler(404)
@@ -308,10 +414,9 @@ class MediaInfoShare:
             ), 500
 
     def run(self):
-        """Start the Flask server and run cleanup task"""
-        expired_count = self.db.delete_expired_media()
-        if expired_count > 0:
-            print(f"Cleaned up {expired_count} expired media entries")
+        """Start the Flask server"""
+        # Exit through atexit on SIGTERM so queued saves are committed
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
 
         ssl_context = None
         if self.app.config["USE_SSL"]:
@@ -0,0 +1,15 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Benchmarks for MediaInfo-Share. Run them from the repository root, e.g.
+`python -m benchmarks.bench_parser`.
+"""
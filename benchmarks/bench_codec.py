@@ -0,0 +1,102 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Encode/decode benchmark of the parsed_info JSON codecs.
+
+Usage:
+    python -m benchmarks.bench_codec [--tracks 40 400] [--repeat 200]
+
+For every installed JSON codec and the compact binary encoding,
+measures encoding MediaInfo.parsed_info_document() and decoding the
+stored document back into display models, the work done by every
+database write and read.
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+from typing import Callable, List, Optional
+import codec
+import compact
+from benchmarks.corpus import CorpusSpec, generate_dump
+from mediainfo_parser import MediaInfoParser
+from models import MediaInfo
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        timings.append((time.perf_counter() - started) / repeat)
+    return min(timings)
+
+
+def _dumps(media: MediaInfo) -> str:
+    return codec.dumps(media.parsed_info_document())
+
+
+def _encode_compact(media: MediaInfo) -> bytes:
+    return compact.encode(media.parsed_info_document())
+
+
+def _decode(document) -> MediaInfo:
+    media = MediaInfo.from_dict({"id": "bench", "filename": "bench", "parsed_info": document})
+    media.general  # pylint: disable=pointless-statement
+    media.tracks  # pylint: disable=pointless-statement
+    return media
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the parsed_info JSON codecs")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[40, 400],
+                        help="Audio plus text track counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing")
+    args = parser.parse_args(argv)
+
+    media_parser = MediaInfoParser()
+    selected = codec.CODEC
+    codecs = [name for name in codec.CODECS if codec.select_codec(name) == name]
+    try:
+        for tracks in args.tracks:
+            audio = max(1, tracks // 5)
+            spec = CorpusSpec(audio_tracks=audio, text_tracks=tracks - audio)
+            text = generate_dump(spec, seed=11)
+            media = MediaInfo(
+                media_id="bench",
+                filename="bench",
+                parsed_info=media_parser.parse_auto(text, "text", full=True),
+            )
+            for name in codecs:
+                codec.CODEC = name
+                document = _dumps(media)
+                encode = _best(partial(_dumps, media), args.repeat)
+                decode = _best(partial(_decode, document), args.repeat)
+                print(f"{tracks:>5} tracks {name:<8} {len(document) / 1024:>8.1f} KiB "
+                      f"encode {encode * 1e6:>9.1f} us  decode {decode * 1e6:>9.1f} us",
+                      flush=True)
+            blob = _encode_compact(media)
+            encode = _best(partial(_encode_compact, media), args.repeat)
+            decode = _best(partial(_decode, blob), args.repeat)
+            print(f"{tracks:>5} tracks {'compact':<8} {len(blob) / 1024:>8.1f} KiB "
+                  f"encode {encode * 1e6:>9.1f} us  decode {decode * 1e6:>9.1f} us",
+                  flush=True)
+    finally:
+        codec.CODEC = selected
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Throughput and allocation benchmark for MediaInfoParser.parse_file.
+
+Usage:
+    python -m benchmarks.bench_parser [--quick] [--threshold 0.2] [--no-save]
+
+Each run is appended to a local history file. A case whose throughput
+drops more than --threshold below the median of its previous runs,
+with the same --quick setting and Python interpreter, is reported as
+a regression and the command exits with status 1. The
+pathological cases also check that parse time grows linearly with the
+number of tracks.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+from mediainfo_parser import MediaInfoParser
+from benchmarks.corpus import PATHOLOGICAL_SPECS, CorpusSpec, generate_corpus, generate_dump
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.jsonl")
+HISTORY_WINDOW = 5
+# Per-line cost of the 10k track dump may be at most this many times the 1k one
+LINEARITY_LIMIT = 2.0
+
+
+def _write_case(directory: str, name: str, texts: List[str]) -> List[str]:
+    paths = []
+    for index, text in enumerate(texts):
+        path = os.path.join(directory, f"{name}_{index:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def run_case(
+    parser: MediaInfoParser, name: str, texts: List[str], directory: str, repeat: int
+) -> Dict:
+    """Time parse_file over a list of dumps and measure its peak allocations"""
+    paths = _write_case(directory, name, texts)
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    total_lines = sum(text.count("\n") + 1 for text in texts)
+
+    for path in paths[:10]:
+        parser.parse_file(path)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            parser.parse_file(path)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+
+    tracemalloc.start()
+    for path in paths:
+        parser.parse_file(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "dumps": len(paths),
+        "bytes": total_bytes,
+        "seconds": best,
+        "dumps_per_s": len(paths) / best,
+        "mb_per_s": total_bytes / best / 1_000_000,
+        "ns_per_line": best / total_lines * 1e9,
+        "peak_alloc_kib": peak / 1024,
+    }
+
+
+def build_cases(quick: bool) -> Dict[str, List[str]]:
+    """Generate the dumps of every benchmark case"""
+    cases = {
+        "corpus": list(generate_corpus(100 if quick else 1000, seed=1)),
+        "many_tracks": list(generate_corpus(
+            20 if quick else 200, seed=2, spec=CorpusSpec(audio_tracks=24, text_tracks=40)
+        )),
+    }
+    for name, spec in PATHOLOGICAL_SPECS.items():
+        cases[name] = [generate_dump(spec, seed=3)]
+    return cases
+
+
+def load_history(path: str) -> List[Dict]:
+    """Read previous benchmark runs"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _interpreter() -> str:
+    return f"{platform.python_implementation()} {platform.python_version()}"
+
+
+def comparable_runs(history: List[Dict], quick: bool) -> List[Dict]:
+    """Keep the runs made on the same corpus size and interpreter as this one"""
+    interpreter = _interpreter()
+    return [
+        run for run in history
+        if run.get("quick") == quick and run.get("interpreter") == interpreter
+    ]
+
+
+def find_regressions(results: Dict, history: List[Dict], threshold: float) -> List[str]:
+    """Compare each case against the median of its recent runs"""
+    regressions = []
+    for name, result in results.items():
+        previous = [
+            run["results"][name]["dumps_per_s"]
+            for run in history[-HISTORY_WINDOW:]
+            if name in run.get("results", {})
+        ]
+        if not previous:
+            continue
+        baseline = statistics.median(previous)
+        if result["dumps_per_s"] < baseline * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['dumps_per_s']:.1f} dumps/s is more than "
+                f"{threshold:.0%} below the recent median of {baseline:.1f}"
+            )
+    return regressions
+
+
+def check_linearity(results: Dict) -> Optional[str]:
+    """Make sure a 10x larger dump does not cost more than 10x to parse"""
+    small, large = results.get("tracks_1k"), results.get("tracks_10k")
+    if not small or not large:
+        return None
+    ratio = large["ns_per_line"] / small["ns_per_line"]
+    if ratio > LINEARITY_LIMIT:
+        return (f"tracks_10k costs {ratio:.2f}x more per line than tracks_1k "
+                f"(limit {LINEARITY_LIMIT:.1f}x): parse time is not linear")
+    return None
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark MediaInfoParser.parse_file")
+    parser.add_argument("--quick", action="store_true", help="Smaller corpus for a fast check")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best kept)")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed throughput drop against history, e.g. 0.2 = 20%%")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="History file (JSON lines)")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run")
+    args = parser.parse_args(argv)
+
+    media_parser = MediaInfoParser()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, texts in build_cases(args.quick).items():
+            result = run_case(media_parser, name, texts, directory, args.repeat)
+            results[name] = result
+            print(f"{name:<16} {result['dumps_per_s']:>10.1f} dumps/s "
+                  f"{result['mb_per_s']:>8.2f} MB/s {result['ns_per_line']:>8.0f} ns/line "
+                  f"{result['peak_alloc_kib']:>10.0f} KiB peak", flush=True)
+
+    history = comparable_runs(load_history(args.history), args.quick)
+    problems = find_regressions(results, history, args.threshold)
+    linearity = check_linearity(results)
+    if linearity:
+        problems.append(linearity)
+
+    if not args.no_save:
+        run = {
+            "timestamp": datetime.now().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "interpreter": _interpreter(),
+            "quick": args.quick,
+            "results": results,
+        }
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
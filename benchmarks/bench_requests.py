@@ -0,0 +1,148 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Requests per second of the read routes, with and without pooled
+database connections and the media cache.
+
+Usage:
+    python -m benchmarks.bench_requests [--entries 200] [--requests 2000] [--threads 1 4]
+
+Seeds a temporary database and upload folder, then drives /preview,
+/share and /download through the Flask test client, once with
+DB_POOL_SIZE=0 (a new connection for every request), once with a pool
+and once with a pool and the media cache. Exits 1 without timing
+anything when the stored rows lack the numeric fields, which reads
+would otherwise parse from the display strings again.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from benchmarks.corpus import generate_corpus
+from mediainfo_parser import AUDIO_NUMBERS, GENERAL_NUMBERS, VIDEO_NUMBERS, parse_frame_rate
+from models import MediaInfo
+
+ROUTES = ("preview", "share", "download")
+
+
+def _build_app(directory: str, pool_size: int, cache_size: int):
+    os.environ["DB_PATH"] = os.path.join(directory, "bench.db")
+    os.environ["UPLOAD_FOLDER"] = os.path.join(directory, "media")
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["CACHE_SIZE"] = str(cache_size)
+    from app import MediaInfoShare  # pylint: disable=import-outside-toplevel
+    share = MediaInfoShare()
+    share.app.config["DEBUG"] = False
+    return share
+
+
+def _close_app(share) -> None:
+    # Hand the expiry lease back while the temporary database still exists
+    share.scheduler.stop()
+    share.db.close()
+
+
+def _seed(share, entries: int) -> List[str]:
+    medias = []
+    store = share._store_media  # pylint: disable=protected-access
+    for text in generate_corpus(entries, seed=5):
+        parsed_info = share.parser.parse_auto(text, "text", full=True)
+        medias.append(store(text, parsed_info, None))
+    share.db.save_media_infos(medias)
+    return [media.media_id for media in medias]
+
+
+def _missing_numbers(section: Dict, numbers: Dict) -> List[str]:
+    missing = [
+        field for field, (display_field, parse) in numbers.items()
+        if section.get(field) is None and parse(section.get(display_field, "")) is not None
+    ]
+    if section.get("fps_num") is None and parse_frame_rate(section.get("frame_rate", "")):
+        missing.append("fps_num")
+    return missing
+
+
+def _check_numbers(share, media_ids: List[str]) -> bool:
+    """Check that the stored parsed_info of every entry holds its numeric fields"""
+    for media_id in media_ids:
+        stored = share.db.load_media_column(media_id, "parsed_info")
+        parsed_info = MediaInfo._decode_parsed_info(stored)  # pylint: disable=protected-access
+        if not parsed_info.get("tracks") or "general" not in parsed_info:
+            print(f"Entry {media_id} was not stored with its display sections and tracks")
+            return False
+        sections = [
+            (parsed_info.get("general", {}), GENERAL_NUMBERS),
+            (parsed_info.get("video", {}), VIDEO_NUMBERS),
+        ] + [(track, AUDIO_NUMBERS) for track in parsed_info.get("audio", [])]
+        for section, numbers in sections:
+            missing = _missing_numbers(section, numbers)
+            if missing:
+                print(f"Entry {media_id} was stored without {', '.join(missing)}")
+                return False
+    return True
+
+
+def _run(share, media_ids: List[str], requests: int, threads: int) -> float:
+    paths = [f"/{ROUTES[i % len(ROUTES)]}/{media_ids[i % len(media_ids)]}" for i in range(requests)]
+
+    def worker(chunk: List[str]) -> None:
+        client = share.app.test_client()
+        for path in chunk:
+            response = client.get(path)
+            response.close()
+
+    chunks = [paths[i::threads] for i in range(threads)]
+    worker(paths[:50])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(worker, chunks))
+    return requests / (time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark requests/s of the read routes")
+    parser.add_argument("--entries", type=int, default=200, help="Stored entries to read")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4],
+                        help="Concurrent client threads")
+    parser.add_argument("--pool-size", type=int, default=8, help="Pool size of the pooled runs")
+    parser.add_argument("--cache-size", type=int, default=512, help="Cache size of the cached run")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        media_ids = None
+        runs = (
+            ("per-call", 0, 0),
+            ("pooled", args.pool_size, 0),
+            ("cached", args.pool_size, args.cache_size),
+        )
+        for label, pool_size, cache_size in runs:
+            share = _build_app(directory, pool_size, cache_size)
+            if media_ids is None:
+                media_ids = _seed(share, args.entries)
+                if not _check_numbers(share, media_ids):
+                    _close_app(share)
+                    return 1
+            for threads in args.threads:
+                rate = _run(share, media_ids, args.requests, threads)
+                print(f"{label:<9} {threads:>2} threads {rate:>9.1f} requests/s", flush=True)
+            _close_app(share)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Deterministic generator for realistic MediaInfo text dumps.
+
+The same seed and parameters always produce byte-identical output, so
+benchmark numbers stay comparable between runs and machines.
+
+Usage:
+    python -m benchmarks.corpus OUT_DIR [--count N] [--seed N] [--audio N] ...
+"""
+
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+KEY_WIDTH = 41
+
+VIDEO_FORMATS = [
+    ("HEVC", "Main 10@L5.1@High", "V_MPEGH/ISO/HEVC"),
+    ("AVC", "High@L4.1", "V_MPEG4/ISO/AVC"),
+    ("AV1", "Main@L5.0", "V_AV1"),
+]
+AUDIO_FORMATS = [
+    ("MLP FBA 16-ch", "Dolby TrueHD with Dolby Atmos", "L R C LFE Ls Rs Lb Rb", "4 512 kb/s"),
+    ("E-AC-3 JOC", "Dolby Digital Plus with Dolby Atmos", "L R C LFE Ls Rs Tfl Tfr", "768 kb/s"),
+    ("AC-3", "Dolby Digital", "L R C LFE Ls Rs", "640 kb/s"),
+    ("DTS XLL", "DTS-HD Master Audio", "C L R Ls Rs LFE", "3 985 kb/s"),
+    ("AAC LC", "", "L R", "192 kb/s"),
+    ("FLAC", "", "L R", "1 024 kb/s"),
+    ("Opus", "", "L R C LFE Ls Rs", "384 kb/s"),
+]
+LANGUAGES = [
+    "English", "Japanese", "French", "German", "Spanish", "Italian", "Korean",
+    "Chinese", "Russian", "Portuguese (BR)", "Polish", "Dutch", "Swedish",
+]
+SUBTITLE_FORMATS = ["PGS", "UTF-8", "ASS", "VobSub"]
+NOISE_KEYS = [
+    "Encoded date", "Tagged date", "Writing library", "Codec configuration box",
+    "Statistics tags issue", "BPS", "DURATION", "NUMBER_OF_FRAMES", "NUMBER_OF_BYTES",
+    "Source duration", "Source stream size", "Delay relative to video", "Service kind",
+    "Compression mode", "Bits/(Pixel*Frame)", "Encoding settings", "Matrix coefficients",
+]
+
+
+@dataclass
+class CorpusSpec:
+    """Parameters of one synthetic MediaInfo dump"""
+    files: int = 1
+    video_tracks: int = 1
+    audio_tracks: int = 3
+    text_tracks: int = 8
+    chapters: int = 12
+    noise_keys: int = 4
+    line_length: int = 0
+
+
+def _line(key: str, value: str) -> str:
+    return f"{key.ljust(KEY_WIDTH)}: {value}"
+
+
+def _duration(rng: random.Random) -> str:
+    minutes = rng.randint(20, 180)
+    if minutes >= 60:
+        return f"{minutes // 60} h {minutes % 60} min"
+    return f"{minutes} min {rng.randint(0, 59)} s"
+
+
+def _noise(rng: random.Random, spec: CorpusSpec) -> List[str]:
+    lines = []
+    for _ in range(spec.noise_keys):
+        value = f"{rng.randint(0, 10 ** 9)}"
+        if spec.line_length:
+            value = value.ljust(spec.line_length, "x")
+        lines.append(_line(rng.choice(NOISE_KEYS), value))
+    return lines
+
+
+def generate_file(rng: random.Random, spec: CorpusSpec, index: int = 0) -> List[str]:
+    """Generate the lines of one General block and its tracks"""
+    duration = _duration(rng)
+    name = f"Show.S01E{index + 1:02d}.2160p.WEB-DL.{rng.randint(1000, 9999)}.mkv"
+    if spec.line_length:
+        name = name.rjust(spec.line_length, "_")
+    lines = [
+        "General",
+        _line("Unique ID", f"{rng.getrandbits(120)}"),
+        _line("Complete name", name),
+        _line("Format", "Matroska"),
+        _line("Format version", "Version 4"),
+        _line("File size", f"{rng.uniform(1, 80):.1f} GiB"),
+        _line("Duration", duration),
+        _line("Overall bit rate mode", "Variable"),
+        _line("Overall bit rate", f"{rng.uniform(4, 80):.1f} Mb/s"),
+        _line("Frame rate", "23.976 FPS"),
+        _line("Movie name", f"Show - Episode {index + 1}"),
+        *_noise(rng, spec),
+        "",
+    ]
+
+    for number in range(spec.video_tracks):
+        video_format, profile, codec_id = rng.choice(VIDEO_FORMATS)
+        width, height = rng.choice([(3840, 2160), (1920, 1080), (1280, 720)])
+        lines += [
+            "Video" if spec.video_tracks == 1 else f"Video #{number + 1}",
+            _line("ID", str(number + 1)),
+            _line("Format", video_format),
+            _line("Format profile", profile),
+            _line("HDR format", "SMPTE ST 2086, HDR10 compatible"),
+            _line("Codec ID", codec_id),
+            _line("Duration", duration),
+            _line("Bit rate", f"{rng.uniform(2, 70):.1f} Mb/s"),
+            _line("Width", f"{width:,} pixels".replace(",", " ")),
+            _line("Height", f"{height:,} pixels".replace(",", " ")),
+            _line("Display aspect ratio", "16:9"),
+            _line("Frame rate mode", "Constant"),
+            _line("Frame rate", "23.976 (24000/1001) FPS"),
+            _line("Bit depth", rng.choice(["8 bits", "10 bits"])),
+            _line("Stream size", f"{rng.uniform(1, 70):.1f} GiB (87%)"),
+            _line("Color primaries", "BT.2020"),
+            _line("Transfer characteristics", "PQ"),
+            *_noise(rng, spec),
+            "",
+        ]
+
+    base_id = spec.video_tracks
+    for number in range(spec.audio_tracks):
+        audio_format, commercial, layout, bit_rate = rng.choice(AUDIO_FORMATS)
+        lines += [
+            f"Audio #{number + 1}",
+            _line("ID", str(base_id + number + 1)),
+            _line("Format", audio_format),
+        ]
+        if commercial:
+            lines.append(_line("Commercial name", commercial))
+        lines += [
+            _line("Duration", duration),
+            _line("Bit rate", bit_rate),
+            _line("Channel(s)", f"{len(layout.split())} channels"),
+            _line("Channel layout", layout),
+            _line("Sampling rate", "48.0 kHz"),
+            _line("Stream size", f"{rng.randint(100, 999)} MiB (3%)"),
+            _line("Title", f"{commercial or audio_format} {number + 1}"),
+            _line("Language", rng.choice(LANGUAGES)),
+            _line("Default", "Yes" if number == 0 else "No"),
+            _line("Forced", "No"),
+            *_noise(rng, spec),
+            "",
+        ]
+
+    base_id += spec.audio_tracks
+    for number in range(spec.text_tracks):
+        lines += [
+            f"Text #{number + 1}",
+            _line("ID", str(base_id + number + 1)),
+            _line("Format", rng.choice(SUBTITLE_FORMATS)),
+            _line("Title", rng.choice(["Full", "SDH", "Forced", "Signs & Songs"])),
+            _line("Language", rng.choice(LANGUAGES)),
+            _line("Default", "No"),
+            _line("Forced", "Yes" if number == 0 else "No"),
+            *_noise(rng, spec),
+            "",
+        ]
+
+    if spec.chapters:
+        lines.append("Menu")
+        for number in range(spec.chapters):
+            seconds = number * 300
+            timestamp = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:00.000"
+            lines.append(_line(timestamp, f"en:Chapter {number + 1:02d}"))
+        lines.append("")
+
+    return lines
+
+
+def generate_dump(spec: CorpusSpec, seed: int = 0) -> str:
+    """Generate one MediaInfo text dump, with spec.files General blocks"""
+    rng = random.Random(seed)
+    lines = []
+    for index in range(spec.files):
+        lines += generate_file(rng, spec, index)
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    count: int, seed: int = 0, spec: Optional[CorpusSpec] = None
+) -> Iterator[str]:
+    """Generate count dumps with track counts varied around spec"""
+    rng = random.Random(seed)
+    base = spec or CorpusSpec()
+    for _ in range(count):
+        yield generate_dump(
+            CorpusSpec(
+                files=base.files,
+                video_tracks=base.video_tracks,
+                audio_tracks=rng.randint(1, max(1, base.audio_tracks * 2)),
+                text_tracks=rng.randint(0, base.text_tracks * 2),
+                chapters=rng.randint(0, base.chapters * 2),
+                noise_keys=base.noise_keys,
+                line_length=base.line_length,
+            ),
+            seed=rng.getrandbits(32),
+        )
+
+
+PATHOLOGICAL_SPECS = {
+    "tracks_1k": CorpusSpec(audio_tracks=500, text_tracks=500, chapters=0, noise_keys=0),
+    "tracks_10k": CorpusSpec(audio_tracks=5000, text_tracks=5000, chapters=0, noise_keys=0),
+    "long_lines_64k": CorpusSpec(noise_keys=8, line_length=65536),
+    "season_pack_24": CorpusSpec(files=24),
+}
+
+
+def main() -> None:
+    """Write a corpus of dumps to a directory"""
+    parser = argparse.ArgumentParser(description="Generate synthetic MediaInfo dumps")
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--files", type=int, default=1, help="General blocks per dump")
+    parser.add_argument("--audio", type=int, default=3)
+    parser.add_argument("--text", type=int, default=8)
+    parser.add_argument("--noise", type=int, default=4, help="Unknown keys per section")
+    parser.add_argument("--line-length", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    spec = CorpusSpec(
+        files=args.files,
+        audio_tracks=args.audio,
+        text_tracks=args.text,
+        noise_keys=args.noise,
+        line_length=args.line_length,
+    )
+    for index, text in enumerate(generate_corpus(args.count, args.seed, spec)):
+        path = os.path.join(args.out_dir, f"dump_{index:06d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(f"Wrote {args.count} dumps to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Bulk import a directory of MediaInfo dumps into the database.
+
+Usage:
+    python bulk_import.py /path/to/dumps [--workers N] [--batch-size N]
+
+Files are parsed across a process pool and inserted in large batched
+transactions. Every imported path is journaled in the same transaction as
+its rows, so an interrupted import can simply be started again.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+import uuid
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from database import Database
+from mediainfo_parser import MediaInfoParser, OUTPUT_EXTENSIONS
+from models import MediaInfo
+from storage import UploadStore
+
+load_dotenv()
+
+IMPORT_EXTENSIONS = (".txt", ".json", ".xml")
+
+_parser: Optional[MediaInfoParser] = None
+
+
+def _init_worker() -> None:
+    global _parser  # pylint: disable=global-statement
+    _parser = MediaInfoParser()
+
+
+def parse_dump(job: Tuple[str, bool]) -> Tuple[str, int, List[Tuple[str, str, Dict]], str]:
+    """Parse one dump in a worker process
+
+    Returns (path, bytes read, [(extension, raw_output, parsed_info)], error).
+    """
+    path, full = job
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        output_format = _parser.detect_format(text)
+        extension = OUTPUT_EXTENSIONS.get(output_format, "txt")
+        records = [
+            (extension, raw_output, parsed_info)
+            for raw_output, parsed_info in _parser.iter_documents(text, output_format, full=full)
+        ]
+        return path, len(text.encode("utf-8")), records, ""
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return path, 0, [], str(e)
+
+
+def iter_dump_paths(directory: str) -> Iterator[str]:
+    """Walk a directory tree and yield the absolute path of every dump file"""
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(IMPORT_EXTENSIONS):
+                yield os.path.abspath(os.path.join(root, name))
+
+
+class BulkImporter:
+    """Class for loading a directory of MediaInfo dumps into the database
+
+    Workers only parse; at most workers * 4 dumps are parsed ahead of the
+    database inserts. Upload files are written by this process right
+    before the batch holding their rows is committed, so none is older
+    than one batch when its row appears, well inside the grace period of
+    reconcile.py.
+    """
+    def __init__(
+        self,
+        db: Database,
+        upload_folder: str,
+        workers: Optional[int] = None,
+        batch_size: int = 1000,
+        expiration_hours: int = 0,
+        full: bool = True,
+    ):
+        self.db = db
+        self.upload_folder = upload_folder
+        self.uploads = UploadStore(upload_folder)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.expiration_hours = expiration_hours
+        self.full = full
+        self.files = 0
+        self.records = 0
+        self.bytes = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def run(self, directory: str) -> None:
+        """Import every dump under directory that is not in the journal yet"""
+        os.makedirs(self.upload_folder, exist_ok=True)
+        done = self.db.get_imported_paths()
+        paths = [path for path in iter_dump_paths(directory) if path not in done]
+        print(f"Importing {len(paths)} files ({len(done)} already imported) "
+              f"with {self.workers} workers", flush=True)
+        if not paths:
+            return
+
+        self.started = time.monotonic()
+        last_report = self.started
+        medias: List[MediaInfo] = []
+        journal: List[Tuple[str, str]] = []
+        jobs = iter(paths)
+        window = self.workers * 4
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            in_flight = set()
+            while True:
+                for path in itertools.islice(jobs, window - len(in_flight)):
+                    in_flight.add(pool.submit(parse_dump, (path, self.full)))
+                if not in_flight:
+                    break
+                finished, in_flight = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+                for future in finished:
+                    path, size, records, error = future.result()
+                    if error:
+                        self.failed += 1
+                        print(f"Skipping {path}: {error}", flush=True)
+                        continue
+
+                    self.files += 1
+                    self.bytes += size
+                    batch = self._build_medias(path, records)
+                    medias.extend(batch)
+                    journal.append((path, batch[0].media_id if batch else ""))
+
+                if len(medias) >= self.batch_size:
+                    self._flush(medias, journal)
+                    medias, journal = [], []
+
+                if time.monotonic() - last_report >= 5:
+                    last_report = time.monotonic()
+                    self._report(len(paths))
+
+        self._flush(medias, journal)
+        self._report(len(paths))
+        self._summary()
+
+    def _build_medias(self, path: str, records: List[Tuple[str, str, Dict]]) -> List[MediaInfo]:
+        now = datetime.now()
+        expiration = None
+        if self.expiration_hours > 0:
+            expiration = now + timedelta(hours=self.expiration_hours)
+        collection_id = str(uuid.uuid4()) if len(records) > 1 else None
+        return [
+            MediaInfo(
+                media_id=str(uuid.uuid4()),
+                filename=f"{uuid.uuid4().hex}_mediainfo.{extension}",
+                original_filename=os.path.basename(path),
+                uploaded_on=now,
+                expiration=expiration,
+                raw_output=raw_output,
+                parsed_info=parsed_info,
+                collection_id=collection_id,
+            )
+            for extension, raw_output, parsed_info in records
+        ]
+
+    def _flush(self, medias: List[MediaInfo], journal: List[Tuple[str, str]]) -> None:
+        if not journal:
+            return
+        written = []
+        try:
+            for media in medias:
+                self.uploads.write(media.filename, media.raw_output)
+                written.append(media.filename)
+            saved = self.db.save_media_infos(medias, journal)
+        except OSError as e:
+            print(f"Error writing upload file: {str(e)}", flush=True)
+            saved = False
+        if not saved:
+            for filename in written:
+                self.uploads.remove(filename)
+            raise RuntimeError("Error while saving an import batch")
+        self.records += len(medias)
+
+    def _report(self, total: int) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(f"{self.files + self.failed}/{total} files, {self.records} records saved, "
+              f"{self.files / elapsed:.1f} files/s, "
+              f"{self.bytes / elapsed / 1_000_000:.2f} MB/s", flush=True)
+
+    def _summary(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(f"Imported {self.files} files ({self.records} records, "
+              f"{self.bytes / 1_000_000:.1f} MB) in {elapsed:.1f}s: "
+              f"{self.files / elapsed:.1f} files/s, {self.bytes / elapsed / 1_000_000:.2f} MB/s, "
+              f"{self.failed} failed", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Bulk import MediaInfo dumps")
+    parser.add_argument("directory", help="Directory to walk for .txt/.json/.xml dumps")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Rows per database transaction")
+    parser.add_argument("--expiration", type=int, default=0,
+                        help="Expire imported entries after this many hours (0 = never)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}")
+        return 1
+
+    importer = BulkImporter(
+        Database(os.getenv("DB_PATH", "mediainfo.db")),
+        os.getenv("UPLOAD_FOLDER", "static/media"),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        expiration_hours=args.expiration,
+        full=os.getenv("FULL_FIDELITY", "1") == "1",
+    )
+    try:
+        importer.run(args.directory)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume")
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Caches of loaded media entries, in-process or shared between worker
+processes through Redis, and coalescing of concurrent loads.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+REDIS_AVAILABLE = redis is not None
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache with a per-entry time to live.
+
+    An entry lives for ttl seconds, or until the wall-clock time passed as
+    expires_on if that comes first, so a cached media entry is never served
+    past its expiration. A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a live cached value, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, expires_on: Optional[datetime] = None) -> None:
+        """Cache a value, evicting the least recently used entry when full"""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl
+        if expires_on is not None:
+            ttl = min(ttl, (expires_on - datetime.now()).total_seconds())
+            if ttl <= 0:
+                return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class RedisCache:
+    """Cache shared by every worker process through a Redis server.
+
+    Offers the same interface as LRUCache. Values are stored as bytes
+    made by encode and read back with decode, and expire in Redis itself,
+    so an invalidation or expiry is seen by every process at once. Any
+    server speaking the Redis protocol will do. Connection errors count
+    as misses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: float,
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+        prefix: str = "mediainfo:",
+    ):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._encode = encode
+        self._decode = decode
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value, or None"""
+        try:
+            data = self._client.get(f"{self.prefix}{key}")
+        except redis.exceptions.RedisError as e:
+            print(f"Cache error while reading {key}: {str(e)}")
+            self._count("errors")
+            data = None
+        if data is None:
+            self._count("misses")
+            return None
+        try:
+            value = self._decode(data)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            # e.g. an entry written by a version with a different layout
+            print(f"Cache error while decoding {key}: {str(e)}")
+            self._count("errors")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_on: Optional[datetime] = None) -> None:
+        """Cache a value until ttl, or expires_on if that comes first"""
+        ttl = self.ttl
+        if expires_on is not None:
+            ttl = min(ttl, (expires_on - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+        try:
+            self._client.set(f"{self.prefix}{key}", self._encode(value), px=int(ttl * 1000))
+        except redis.exceptions.RedisError as e:
+            print(f"Cache error while writing {key}: {str(e)}")
+            self._count("errors")
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value in every process"""
+        try:
+            self._client.delete(f"{self.prefix}{key}")
+        except redis.exceptions.RedisError as e:
+            print(f"Cache error while invalidating {key}: {str(e)}")
+            self._count("errors")
+
+    def clear(self) -> None:
+        """Drop every value under this cache's prefix"""
+        try:
+            keys = list(self._client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self._client.delete(*keys)
+        except redis.exceptions.RedisError as e:
+            print(f"Cache error while clearing: {str(e)}")
+            self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and error counters of this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class _Flight:
+    """A load in progress and the callers waiting on it"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key into one.
+
+    The first caller for a key runs the load; callers arriving while it
+    is in flight wait for it and get the same result, or the same error.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, load: Callable[[], T]) -> T:
+        """Return load(), sharing one call between concurrent callers of a key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.loads += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = load()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Load and coalescing counters"""
+        with self._lock:
+            calls = self.loads + self.coalesced
+            return {
+                "in_flight": len(self._flights),
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "coalescing_rate": self.coalesced / calls if calls else 0.0,
+            }
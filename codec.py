@@ -0,0 +1,103 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+JSON encoding and decoding for stored parsed_info documents.
+
+orjson or msgspec are used when installed and the standard library json
+module otherwise. JSON_CODEC (auto, orjson, msgspec or json) picks one
+explicitly. Decode errors are always raised as ValueError.
+"""
+
+import json
+import os
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+load_dotenv()
+
+CODECS = ("msgspec", "orjson", "json")
+
+
+def select_codec(name: str) -> str:
+    """Return name if that codec is installed, else the fastest installed codec"""
+    available = {"msgspec": msgspec is not None, "orjson": orjson is not None, "json": True}
+    if name in available:
+        if available[name]:
+            return name
+        print(f"JSON codec {name} is not installed, falling back")
+    elif name != "auto":
+        print(f"Unknown JSON_CODEC {name}, falling back")
+    return next(codec for codec in CODECS if available[codec])
+
+
+CODEC = select_codec(os.getenv("JSON_CODEC", "auto").lower())
+
+_msgspec_encoder = msgspec.json.Encoder() if msgspec else None
+_msgspec_decoder = msgspec.json.Decoder() if msgspec else None
+_typed_decoders = {}
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> str:
+    """Encode an object as a JSON string
+
+    Dataclasses are encoded natively by orjson and msgspec and through
+    their to_dict() method by the json module.
+    """
+    if CODEC == "orjson":
+        return orjson.dumps(obj).decode()  # pylint: disable=no-member
+    if CODEC == "msgspec":
+        return _msgspec_encoder.encode(obj).decode()
+    return json.dumps(obj, default=_default)
+
+
+def loads(data: Any, schema: Optional[type] = None) -> Any:
+    """Decode a JSON string or bytes
+
+    With msgspec, a schema type decodes straight into the typed models it
+    describes. Documents that do not match the schema, and every other
+    codec, fall back to plain dictionaries and lists.
+    """
+    if CODEC == "msgspec":
+        if schema is not None:
+            decoder = _typed_decoders.get(schema)
+            if decoder is None:
+                decoder = _typed_decoders.setdefault(schema, msgspec.json.Decoder(schema))
+            try:
+                return decoder.decode(data)
+            except msgspec.ValidationError:
+                pass
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    if CODEC == "orjson":
+        return orjson.loads(data)  # pylint: disable=no-member
+    return json.loads(data)
@@ -0,0 +1,475 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Compact, schema-versioned binary encoding of parsed_info documents.
+
+Layout (version 1):
+    magic "MIB" and a version byte
+    literal table: varint count, a mode byte, varint byte size and the
+        UTF-8 literals joined by NUL (mode 0), or preceded by their varint
+        sizes when a literal contains NUL itself (mode 1)
+    token stream: width byte (2 or 4), varint count and the little-endian
+        unsigned tokens
+
+A string is stored as a reference into the static vocabulary followed by
+the literal table, so every distinct string is written once per document.
+The token stream holds section tags, counts, field heads and references:
+    1 general, 2 video      struct
+    3 audio, 4 subtitles    count, structs
+    5 format, 6 ref         reference
+    7 tracks                count, per track: type reference, key count n,
+                            n key references, n value references, chapter
+                            count c, c timestamp and c title references
+    8 extra                 key reference, JSON literal reference
+    0 end
+A struct is an entry count followed by entries whose head is
+(field number << 2) | value type, then the value reference. Value types
+are 0 string, 1 integer (as decimal text) and 2 JSON text. Field number 0
+is followed by a reference to the field name, for keys the schema does
+not know. Empty strings and None are left out and come back as the model
+defaults. References are fixed-width so whole track key/value runs decode
+in C through array slicing.
+
+The field lists and the vocabulary of a version are stored positionally,
+so they must never change; new fields or words go into a new version.
+"""
+
+import json
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b"MIB"
+VERSION = 1
+
+SECTION_END = 0
+SECTION_GENERAL = 1
+SECTION_VIDEO = 2
+SECTION_AUDIO = 3
+SECTION_SUBTITLES = 4
+SECTION_FORMAT = 5
+SECTION_REF = 6
+SECTION_TRACKS = 7
+SECTION_EXTRA = 8
+
+VALUE_STRING = 0
+VALUE_INT = 1
+VALUE_JSON = 2
+
+LITERALS_SEPARATED = 0
+LITERALS_SIZED = 1
+
+GENERAL_FIELDS_V1 = (
+    "format", "duration", "bitrate", "size", "frame_rate", "complete_name", "movie_name",
+    "duration_ms", "bitrate_bps", "size_bytes", "fps_num", "fps_den",
+)
+VIDEO_FIELDS_V1 = (
+    "format", "width", "height", "aspect_ratio", "frame_rate", "bit_rate", "bit_depth",
+    "hdr_format", "color_primaries", "transfer_characteristics", "title", "stream_size",
+    "width_px", "height_px", "bit_rate_bps", "stream_size_bytes", "fps_num", "fps_den",
+)
+AUDIO_FIELDS_V1 = (
+    "language", "format", "channels", "bit_rate", "format_settings", "sampling_rate",
+    "commercial_name", "title", "flag", "stream_size", "default", "language_code",
+    "bit_rate_bps", "sample_rate_hz", "stream_size_bytes",
+)
+SUBTITLE_FIELDS_V1 = ("language", "flag", "title", "default", "forced", "language_code")
+
+VOCABULARY_V1 = (
+    # Section types
+    "General", "Video", "Audio", "Text", "Menu", "Image", "Other",
+    # Text output keys
+    "Format", "Title", "Language", "Default", "Forced", "Codec ID", "Bit rate", "Stream size",
+    "Nominal bit rate", "Sampling frequency", "Sampling rate", "Channel layout",
+    "Format settings", "Commercial name", "Channels", "Delay relative to video", "Frame rate",
+    "Video delay", "Channel(s)", "Movie name", "Writing application", "File size", "Size",
+    "Encoded date", "Tagged date", "Complete name", "Duration", "Overall bit rate",
+    "Display aspect ratio", "Width", "Height", "Color primaries", "Frame rate mode",
+    "Transfer characteristics", "Matrix coefficients", "Bit depth", "HDR format",
+    "Aspect ratio", "ID", "Format/Info", "Unique ID", "Format version",
+    "Overall bit rate mode", "Format profile", "Color space", "Chroma subsampling",
+    "Bit rate mode", "Maximum bit rate", "Compression mode", "Scan type",
+    "Bits/(Pixel*Frame)", "Writing library", "Encoding settings", "Color range",
+    "Mastering display color primaries", "Mastering display luminance",
+    "Maximum Content Light Level", "Maximum Frame-Average Light Level", "Codec ID/Info",
+    "Original frame rate", "Frame count", "Stream size (bits)", "Count of elements",
+    "Source duration", "Source stream size", "Service kind", "Statistics tags issue",
+    "Format profile level", "Format level", "Format tier", "Codec configuration box",
+    "Duration_LastFrame", "Muxing mode", "Enabled", "Alternate group", "Menu ID",
+    "Coder type", "Number of frames", "Complexity index", "Number of dynamic objects",
+    "Bed channel count", "Bed channel configuration", "Dialog Normalization",
+    # JSON and XML output keys
+    "@type", "StreamOrder", "UniqueID", "CodecID", "BitRate", "BitRate_Mode",
+    "BitRate_Maximum", "BitRate_Nominal", "FrameRate", "FrameRate_Num", "FrameRate_Den",
+    "FrameRate_Mode", "FrameCount", "BitDepth", "ChannelLayout", "ChannelPositions",
+    "SamplingRate", "SamplingCount", "StreamSize", "CompleteName", "FileSize",
+    "OverallBitRate", "OverallBitRate_Mode", "DisplayAspectRatio", "PixelAspectRatio",
+    "HDR_Format", "HDR_Format_Version", "HDR_Format_Profile", "HDR_Format_Compatibility",
+    "colour_primaries", "transfer_characteristics", "matrix_coefficients", "colour_range",
+    "colour_description_present", "Format_Profile", "Format_Level", "Format_Tier",
+    "Format_Commercial_IfAny", "Format_Settings", "Format_Version", "ColorSpace",
+    "ChromaSubsampling", "ScanType", "Compression_Mode", "Delay", "Delay_Source",
+    "Encoded_Library", "Encoded_Library_Name", "Encoded_Application", "Encoded_Date",
+    "Tagged_Date", "ElementCount", "VideoCount", "AudioCount", "TextCount", "MenuCount",
+    "IsStreamable", "Movie", "Sampled_Width", "Sampled_Height", "Stored_Height",
+    "Duration_Start", "Duration_End", "Typeorder", "ServiceKind", "Video_Delay",
+    "extra.Title", "CompleteName_Last",
+    # Common values
+    "Yes", "No", "Lossy", "Lossless", "Constant", "Variable", "Progressive", "Interlaced",
+    "Matroska", "MPEG-4", "AVI", "HEVC", "AVC", "AV1", "VP9", "MPEG Video", "VC-1",
+    "AAC LC", "AAC", "AC-3", "E-AC-3", "E-AC-3 JOC", "DTS", "DTS XLL", "DTS XLL X",
+    "MLP FBA", "MLP FBA 16-ch", "FLAC", "Opus", "PCM", "MPEG Audio", "Vorbis",
+    "Dolby Digital", "Dolby Digital Plus", "Dolby Digital Plus with Dolby Atmos",
+    "Dolby TrueHD", "Dolby TrueHD with Dolby Atmos", "DTS-HD Master Audio", "DTS:X",
+    "PGS", "UTF-8", "ASS", "SSA", "SRT", "VobSub", "Timed Text",
+    "V_MPEGH/ISO/HEVC", "V_MPEG4/ISO/AVC", "V_AV1", "A_AAC-2", "A_AC3", "A_EAC3",
+    "A_DTS", "A_TRUEHD", "A_FLAC", "A_OPUS", "S_HDMV/PGS", "S_TEXT/UTF8", "S_TEXT/ASS",
+    "YUV", "4:2:0", "8 bits", "10 bits", "12 bits", "16 bits", "24 bits",
+    "BT.2020", "BT.709", "BT.601", "PQ", "HLG", "Limited", "Full",
+    "BT.2020 non-constant", "SMPTE ST 2086, HDR10 compatible", "Dolby Vision",
+    "16:9", "4:3", "2.40:1", "2.39:1", "1.85:1", "2.35:1", "2.00:1",
+    "23.976 FPS", "24.000 FPS", "25.000 FPS", "29.970 FPS", "50.000 FPS", "59.940 FPS",
+    "23.976 (24000/1001) FPS", "29.970 (30000/1001) FPS", "59.940 (60000/1001) FPS",
+    "23.976", "24.000", "25.000", "29.970", "24000", "1001", "30000", "60000",
+    "48.0 kHz", "44.1 kHz", "96.0 kHz", "48000", "44100", "96000",
+    "2 channels", "6 channels", "8 channels", "1 channel", "2", "6", "8",
+    "L R", "L R C LFE Ls Rs", "L R C LFE Ls Rs Lb Rb", "C L R Ls Rs LFE", "Object Based",
+    "3 840 pixels", "2 160 pixels", "1 920 pixels", "1 080 pixels", "1 280 pixels",
+    "720 pixels", "3840", "2160", "1920", "1080", "1280", "720",
+    "Version 4", "Version 2", "Main 10@L5.1@High", "High@L4.1", "Main@L5.0",
+    "Little", "Big", "Signed", "Unsigned", "Dolby Surround EX", "Dolby Atmos",
+    "video", "audio", "text",
+    # Languages and ISO 639-1 codes
+    "English", "Japanese", "French", "German", "Spanish", "Italian", "Korean", "Chinese",
+    "Russian", "Portuguese", "Polish", "Dutch", "Swedish", "Danish", "Norwegian", "Finnish",
+    "Czech", "Hungarian", "Greek", "Turkish", "Arabic", "Hebrew", "Hindi", "Thai",
+    "Vietnamese", "Indonesian", "Malay", "Ukrainian", "Romanian", "Bulgarian", "Croatian",
+    "Serbian", "Slovak", "Slovenian", "Estonian", "Latvian", "Lithuanian", "Icelandic",
+    "Persian", "Tamil", "Telugu", "Catalan", "Basque", "Galician", "Filipino",
+    "Portuguese (BR)", "Spanish (Latin America)", "Chinese (Simplified)",
+    "Chinese (Traditional)", "Cantonese", "Mandarin", "Undetermined",
+    "en", "ja", "fr", "de", "es", "it", "ko", "zh", "ru", "pt", "pl", "nl", "sv", "da", "no",
+    "nb", "fi", "cs", "hu", "el", "tr", "ar", "he", "hi", "th", "vi", "id", "ms", "uk",
+    "ro", "bg", "hr", "sr", "sk", "sl", "et", "lv", "lt", "is", "fa", "ta", "te", "ca",
+    "eu", "gl", "fil", "yue", "cmn", "und", "pt-BR", "es-419", "zh-Hans", "zh-Hant",
+    "en-US", "en-GB", "fr-CA", "fr-FR", "es-ES", "de-DE", "ja-JP", "ko-KR",
+    "\U0001F1FA\U0001F1F8", "\U0001F1EC\U0001F1E7", "\U0001F1EF\U0001F1F5",
+    "\U0001F1EB\U0001F1F7", "\U0001F1E9\U0001F1EA", "\U0001F1EA\U0001F1F8",
+    "\U0001F1EE\U0001F1F9", "\U0001F1F0\U0001F1F7", "\U0001F1E8\U0001F1F3",
+    "\U0001F1F7\U0001F1FA", "\U0001F1E7\U0001F1F7", "\U0001F1F5\U0001F1F9",
+    "\U0001F1F2\U0001F1FD", "\U0001F1F9\U0001F1FC",
+    "json", "xml", "SDH", "Signs & Songs", "Commentary",
+)
+
+SCHEMAS = {
+    1: (
+        {
+            SECTION_GENERAL: GENERAL_FIELDS_V1,
+            SECTION_VIDEO: VIDEO_FIELDS_V1,
+            SECTION_AUDIO: AUDIO_FIELDS_V1,
+            SECTION_SUBTITLES: SUBTITLE_FIELDS_V1,
+        },
+        VOCABULARY_V1,
+    ),
+}
+
+SECTION_KEYS = {
+    "general": SECTION_GENERAL,
+    "video": SECTION_VIDEO,
+    "audio": SECTION_AUDIO,
+    "subtitles": SECTION_SUBTITLES,
+    "format": SECTION_FORMAT,
+    "ref": SECTION_REF,
+    "tracks": SECTION_TRACKS,
+}
+SECTION_NAMES = {tag: key for key, tag in SECTION_KEYS.items()}
+
+
+_WRITER_TABLES = (
+    {
+        tag: {name: number for number, name in enumerate(names, 1)}
+        for tag, names in SCHEMAS[VERSION][0].items()
+    },
+    {word: index for index, word in reversed(list(enumerate(SCHEMAS[VERSION][1])))},
+    len(SCHEMAS[VERSION][1]),
+)
+
+
+def is_compact(data: Any) -> bool:
+    """Tell a compact encoded parsed_info value from a JSON one"""
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == MAGIC
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _as_dict(value: Any) -> Dict:
+    return value if isinstance(value, dict) else value.to_dict()
+
+
+class _References(dict):
+    """String to reference map that appends unknown strings to the literals"""
+
+    def __init__(self, vocabulary: Dict[str, int], size: int):
+        super().__init__(vocabulary)
+        self.size = size
+        self.literals: List[str] = []
+
+    def __missing__(self, value: str) -> int:
+        index = self[value] = self.size + len(self.literals)
+        self.literals.append(value)
+        return index
+
+
+class _Writer:
+    def __init__(
+        self, field_numbers: Dict[int, Dict[str, int]], vocabulary: Dict[str, int], size: int
+    ):
+        self.field_numbers = field_numbers
+        self.refs = _References(vocabulary, size)
+        self.ref = self.refs.__getitem__
+        self.literals = self.refs.literals
+        self.tokens: List[int] = []
+
+    def struct(self, tag: int, data: Dict) -> None:
+        """Write the non-empty fields of a section as an entry count and entries"""
+        numbers, ref, tokens = self.field_numbers[tag], self.ref, self.tokens
+        count_at = len(tokens)
+        tokens.append(0)
+        for key, value in data.items():
+            if value is None or value == "":
+                continue
+            number = numbers.get(key, 0)
+            if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                head = number << 2 | VALUE_STRING
+            elif type(value) is int:  # pylint: disable=unidiomatic-typecheck
+                head, value = number << 2 | VALUE_INT, str(value)
+            else:
+                head, value = number << 2 | VALUE_JSON, json.dumps(value)
+            if number:
+                tokens += (head, ref(value))
+            else:
+                tokens += (head, ref(key), ref(value))
+            tokens[count_at] += 1
+
+    def track(self, track: Dict) -> None:
+        """Write a track as its type, key and value references and chapters"""
+        ref, tokens = self.ref, self.tokens
+        keys, values = track.get("keys", ()), track.get("values", ())
+        chapters = track.get("chapters", ())
+        tokens.append(ref(track.get("type", "")))
+        tokens.append(len(keys))
+        tokens.extend(map(ref, keys))
+        tokens.extend(map(ref, values))
+        tokens.append(len(chapters))
+        if chapters:
+            timestamps, titles = zip(*chapters)
+            tokens.extend(map(ref, timestamps))
+            tokens.extend(map(ref, titles))
+
+    def to_bytes(self) -> bytes:
+        """Return the header, literal table and token stream as bytes"""
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        _write_varint(out, len(self.literals))
+        joined = "\x00".join(self.literals)
+        if joined.count("\x00") == max(len(self.literals) - 1, 0):
+            out.append(LITERALS_SEPARATED)
+            data = joined.encode("utf-8")
+        else:
+            out.append(LITERALS_SIZED)
+            encoded = [literal.encode("utf-8") for literal in self.literals]
+            for literal in encoded:
+                _write_varint(out, len(literal))
+            data = b"".join(encoded)
+        _write_varint(out, len(data))
+        out += data
+
+        tokens = array("H" if max(self.tokens, default=0) <= 0xFFFF else "I", self.tokens)
+        if tokens.itemsize == 2:
+            out.append(2)
+        else:
+            tokens = array("L" if array("L").itemsize == 4 else "I", self.tokens)
+            out.append(4)
+        if sys.byteorder == "big":
+            tokens.byteswap()
+        _write_varint(out, len(tokens))
+        out += tokens.tobytes()
+        return bytes(out)
+
+
+def encode(document: Dict) -> bytes:
+    """Encode a parsed_info dictionary (or one holding the models) into bytes"""
+    writer = _Writer(*_WRITER_TABLES)
+    tokens = writer.tokens
+    for key, value in document.items():
+        tag = SECTION_KEYS.get(key)
+        if tag is None:
+            tokens += (SECTION_EXTRA, writer.ref(key), writer.ref(json.dumps(value)))
+            continue
+        tokens.append(tag)
+        if tag in (SECTION_GENERAL, SECTION_VIDEO):
+            writer.struct(tag, _as_dict(value))
+        elif tag in (SECTION_AUDIO, SECTION_SUBTITLES):
+            tokens.append(len(value))
+            for item in value:
+                writer.struct(tag, _as_dict(item))
+        elif tag == SECTION_TRACKS:
+            tokens.append(len(value))
+            for track in value:
+                writer.track(_as_dict(track))
+        else:
+            tokens.append(writer.ref(value or ""))
+    tokens.append(SECTION_END)
+    return writer.to_bytes()
+
+
+def _read_tables(data: bytes, vocabulary: Tuple[str, ...]) -> Tuple[Tuple[str, ...], array]:
+    literal_count, pos = _read_varint(data, 4)
+    mode = data[pos]
+    pos += 1
+    if mode == LITERALS_SIZED:
+        sizes = []
+        for _ in range(literal_count):
+            size, pos = _read_varint(data, pos)
+            sizes.append(size)
+    total, pos = _read_varint(data, pos)
+    blob = data[pos:pos + total]
+    pos += total
+    if mode == LITERALS_SEPARATED:
+        literals = blob.decode("utf-8").split("\x00") if literal_count else []
+    else:
+        literals, offset = [], 0
+        for size in sizes:
+            literals.append(blob[offset:offset + size].decode("utf-8"))
+            offset += size
+    if len(literals) != literal_count:
+        raise ValueError("Literal table does not match its count")
+
+    width = data[pos]
+    count, pos = _read_varint(data, pos + 1)
+    tokens = array("H" if width == 2 else ("L" if array("L").itemsize == 4 else "I"))
+    if tokens.itemsize != width:
+        raise ValueError(f"Unsupported token width {width}")
+    tokens.frombytes(data[pos:pos + count * width])
+    if len(tokens) != count:
+        raise ValueError("Token stream is truncated")
+    if sys.byteorder == "big":
+        tokens.byteswap()
+    return vocabulary + tuple(literals), tokens
+
+
+def decode(data: bytes) -> Dict:
+    """Decode bytes written by encode() back into a parsed_info dictionary"""
+    data = bytes(data)
+    if data[:3] != MAGIC:
+        raise ValueError("Not a compact parsed_info value")
+    version = data[3]
+    if version not in SCHEMAS:
+        raise ValueError(f"Unsupported compact parsed_info version {version}")
+    fields, vocabulary = SCHEMAS[version]
+    try:
+        table, tokens = _read_tables(data, vocabulary)
+        return _read_document(table, tokens, fields)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Truncated or corrupt compact parsed_info: {e}") from e
+
+
+def _read_document(table: Tuple[str, ...], tokens: array, fields: Dict) -> Dict:
+    lookup = table.__getitem__
+    document: Dict[str, Any] = {}
+    pos = 0
+
+    def struct(names: Tuple[str, ...]) -> Dict:
+        nonlocal pos
+        result = {}
+        count = tokens[pos]
+        pos += 1
+        for _ in range(count):
+            head = tokens[pos]
+            number = head >> 2
+            if number:
+                key = names[number - 1]
+                pos += 1
+            else:
+                key = table[tokens[pos + 1]]
+                pos += 2
+            text = table[tokens[pos]]
+            pos += 1
+            value_type = head & 3
+            if value_type == VALUE_INT:
+                result[key] = int(text)
+            elif value_type == VALUE_JSON:
+                result[key] = json.loads(text)
+            else:
+                result[key] = text
+        return result
+
+    while True:
+        tag = tokens[pos]
+        pos += 1
+        if tag == SECTION_END:
+            return document
+        if tag in (SECTION_GENERAL, SECTION_VIDEO):
+            document[SECTION_NAMES[tag]] = struct(fields[tag])
+        elif tag in (SECTION_AUDIO, SECTION_SUBTITLES):
+            count = tokens[pos]
+            pos += 1
+            names = fields[tag]
+            document[SECTION_NAMES[tag]] = [struct(names) for _ in range(count)]
+        elif tag == SECTION_TRACKS:
+            count = tokens[pos]
+            pos += 1
+            tracks = []
+            for _ in range(count):
+                track_type = table[tokens[pos]]
+                size = tokens[pos + 1]
+                pos += 2
+                track = {
+                    "type": track_type,
+                    "keys": tuple(map(lookup, tokens[pos:pos + size])),
+                    "values": tuple(map(lookup, tokens[pos + size:pos + 2 * size])),
+                }
+                pos += 2 * size
+                chapter_count = tokens[pos]
+                pos += 1
+                if chapter_count:
+                    track["chapters"] = tuple(zip(
+                        map(lookup, tokens[pos:pos + chapter_count]),
+                        map(lookup, tokens[pos + chapter_count:pos + 2 * chapter_count]),
+                    ))
+                    pos += 2 * chapter_count
+                tracks.append(track)
+            document["tracks"] = tracks
+        elif tag in (SECTION_FORMAT, SECTION_REF):
+            document[SECTION_NAMES[tag]] = table[tokens[pos]]
+            pos += 1
+        elif tag == SECTION_EXTRA:
+            document[table[tokens[pos]]] = json.loads(table[tokens[pos + 1]])
+            pos += 2
+        else:
+            raise ValueError(f"Unknown compact parsed_info section {tag}")
@@ -14,13 +14,232 @@ the Free Software Foundation, either version 3 of the License, or
 import sqlite3
 import os
 import json
+import queue
+import random
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TypeVar
 from dotenv import load_dotenv
+import codec
+import compact
+from cache import REDIS_AVAILABLE, LRUCache, RedisCache, SingleFlight
+from idfilter import EXPIRED, LIVE, MediaIdFilter
+from storage import UploadStore
+from languages import resolve_language
 from models import MediaInfo
 
 load_dotenv()
 
+T = TypeVar("T")
+
+# SQLite settings per DB_PROFILE. fsync_uploads matches the durability of
+# the uploaded files to that of the committed rows pointing at them.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "fsync_uploads": True,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32768,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "fsync_uploads": False,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -65536,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "fsync_uploads": False,
+    },
+}
+CONNECTION_PRAGMAS = ("synchronous", "cache_size", "mmap_size", "temp_store")
+BUSY_BACKOFF = 0.05
+BUSY_BACKOFF_MAX = 1.0
+# How often a caller waiting on the group commit checks the writer is alive
+WRITER_CHECK_INTERVAL = 1.0
+
+
+def _timestamp(expiration: Any) -> Optional[float]:
+    if not expiration:
+        return None
+    if isinstance(expiration, str):
+        expiration = datetime.fromisoformat(expiration)
+    return expiration.timestamp()
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class ConnectionPool:
+    """Bounded pool of idle SQLite connections shared between threads.
+
+    acquire() never blocks: when every pooled connection is in use a new one
+    is opened, and release() closes it again once the pool already holds
+    size idle connections. A size of 0 disables pooling.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int):
+        self._connect = connect
+        self.size = size
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, or open one if none is left."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, closing it if the pool is full."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection and stop pooling released ones."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class _PendingSave:
+    """Entries of one save_media_infos call waiting for the group commit."""
+
+    __slots__ = ("medias", "imported_files", "done", "saved")
+
+    def __init__(self, medias: List[MediaInfo], imported_files: Optional[List[tuple]]):
+        self.medias = medias
+        self.imported_files = imported_files
+        self.done = threading.Event()
+        self.saved = False
+
+
+class GroupCommitWriter:
+    """Single writer thread committing queued saves in shared transactions.
+
+    A batch is committed once it holds max_rows entries or max_delay
+    seconds after its first save was queued, whichever comes first, so a
+    burst of uploads pays for one fsync instead of one each. Every caller
+    blocks until the batch holding its entries is committed.
+    """
+
+    def __init__(self, db: "Database", max_delay: float, max_rows: int):
+        self.db = db
+        self.max_delay = max_delay
+        self.max_rows = max_rows
+        self._queue: "queue.Queue[Optional[_PendingSave]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, medias: List[MediaInfo], imported_files: Optional[List[tuple]]) -> bool:
+        """Queue entries and wait until they are committed.
+
+        Returns:
+            bool: True if the entries were saved, False otherwise
+        """
+        pending = _PendingSave(medias, imported_files)
+        with self._lock:
+            if self._closed or not self._thread.is_alive():
+                return self.db.write_media_infos(medias, imported_files)
+            self._queue.put(pending)
+        while not pending.done.wait(WRITER_CHECK_INTERVAL):
+            if not self._thread.is_alive():
+                # Nothing will drain the queue any more
+                if pending.done.is_set():
+                    break
+                print("Group commit writer stopped, saving directly")
+                return self.db.write_media_infos(medias, imported_files)
+        return pending.saved
+
+    def close(self) -> None:
+        """Commit everything already queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            pending = self._queue.get()
+            if pending is None:
+                return
+            batch = [pending]
+            rows = len(pending.medias)
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_rows:
+                try:
+                    pending = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+                rows += len(pending.medias)
+            try:
+                self._commit(batch)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # The thread must survive a bad batch or every save hangs
+                print(f"Group commit failed: {str(e)}")
+
+    def _commit(self, batch: List[_PendingSave]) -> None:
+        def insert(conn: sqlite3.Connection) -> None:
+            for pending in batch:
+                self.db.insert_media_infos(conn, pending.medias, pending.imported_files)
+
+        try:
+            try:
+                self.db.transaction(insert)
+                saved = True
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Database error: {str(e)}")
+                saved = False
+            if saved or len(batch) == 1:
+                for pending in batch:
+                    pending.saved = saved
+                return
+
+            # One failing save (e.g. a duplicate ID) must not fail the others
+            for pending in batch:
+                try:
+                    pending.saved = self.db.write_media_infos(
+                        pending.medias, pending.imported_files
+                    )
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    print(f"Invalid media entry: {str(e)}")
+                finally:
+                    pending.done.set()
+        finally:
+            for pending in batch:
+                pending.done.set()
+
 
 class Database:
     """Database class for managing media information storage."""
@@ -33,21 +252,331 @@ class Database:
         """
         self.db_path = db_path
         self.media_folder = os.getenv("UPLOAD_FOLDER", "static/media")
+        self.uploads = UploadStore(self.media_folder)
+        self.parsed_info_encoding = os.getenv("PARSED_INFO_ENCODING", "binary").lower()
+        profile = os.getenv("DB_PROFILE", "balanced").lower()
+        if profile not in PROFILES:
+            print(f"Unknown DB_PROFILE {profile}, using balanced")
+            profile = "balanced"
+        self.profile = PROFILES[profile]
+        self.busy_timeout = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))
+        self.busy_retries = int(os.getenv("DB_BUSY_RETRIES", "5"))
+        self.pool = ConnectionPool(self.get_connection, int(os.getenv("DB_POOL_SIZE", "8")))
+        self._local = threading.local()
+        self.cache = self._create_cache()
+        self.cache_shared = isinstance(self.cache, RedisCache)
+        self.flights = SingleFlight()
+        self.cleanup_chunk_size = int(os.getenv("CLEANUP_CHUNK_SIZE", "100"))
+        self.cleanup_max_rows = int(os.getenv("CLEANUP_MAX_ROWS", "5000"))
+        self.cleanup_time_budget = float(os.getenv("CLEANUP_TIME_BUDGET", "0.5"))
+        self._unlink_pool = futures.ThreadPoolExecutor(
+            int(os.getenv("CLEANUP_UNLINK_WORKERS", "4")), thread_name_prefix="unlink"
+        )
+        self.id_filter: Optional[MediaIdFilter] = None
+        self.id_filter_enabled = os.getenv("ID_FILTER", "1") == "1"
+        self.id_filter_error_rate = float(os.getenv("ID_FILTER_ERROR_RATE", "0.001"))
+        self.id_filter_rejected = 0
+        self.id_filter_sync_interval = float(os.getenv("ID_FILTER_SYNC_MS", "20")) / 1000
+        self._filter_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._filter_next_sync = 0.0
+        self._filter_conn: Optional[sqlite3.Connection] = None
+        self._filter_version = None
+        self._filter_watermark = 0
+        self._expired_checked: Set[str] = set()
         self.init_db()
+        self.writer = None
+        group_commit_ms = float(os.getenv("DB_GROUP_COMMIT_MS", "0"))
+        if group_commit_ms > 0:
+            self.writer = GroupCommitWriter(
+                self, group_commit_ms / 1000, int(os.getenv("DB_GROUP_COMMIT_ROWS", "200"))
+            )
+
+    def _create_cache(self):
+        """Create the media cache selected by CACHE_BACKEND (memory or redis)."""
+        ttl = float(os.getenv("CACHE_TTL", "300"))
+        backend = os.getenv("CACHE_BACKEND", "memory").lower()
+        if backend == "redis":
+            if REDIS_AVAILABLE:
+                return RedisCache(
+                    os.getenv("CACHE_URL", "redis://localhost:6379/0"),
+                    ttl,
+                    self._encode_cached,
+                    self._decode_cached,
+                )
+            print("CACHE_BACKEND redis needs the redis package, using memory")
+        elif backend != "memory":
+            print(f"Unknown CACHE_BACKEND {backend}, using memory")
+        return LRUCache(int(os.getenv("CACHE_SIZE", "512")), ttl)
+
+    @staticmethod
+    def _encode_cached(media: MediaInfo) -> bytes:
+        """Serialize an entry for a shared cache, without its raw output.
+
+        A JSON header with the small columns is followed by a NUL byte and
+        parsed_info exactly as stored in the row, once the entry has read
+        it. Nothing is decoded or encoded again for the cache.
+        """
+        header = codec.dumps({
+            "id": media.media_id,
+            "filename": media.filename,
+            "original_filename": media.original_filename,
+            "uploaded_on": media.uploaded_on.isoformat() if media.uploaded_on else None,
+            "expiration": media.expiration.isoformat() if media.expiration else None,
+            "password": media.password,
+            "collection_id": media.collection_id,
+        })
+        stored = media.stored_parsed_info or b""
+        if isinstance(stored, str):
+            stored = stored.encode()
+        return header.encode() + b"\0" + stored
+
+    def _decode_cached(self, data: bytes) -> MediaInfo:
+        """Rebuild an entry serialized by _encode_cached."""
+        header, _, stored = data.partition(b"\0")
+        return self._deferred_media(codec.loads(header), stored or None)
+
+    def _deferred_media(self, row: Dict, stored_parsed_info: Any = None) -> MediaInfo:
+        """Create an entry whose heavy columns are read on first access.
+
+        With a shared cache, the cached copy gets parsed_info added once
+        an entry has read it from the database.
+        """
+        media = MediaInfo.deferred(row, lambda _, column: self._load_deferred(media, column))
+        media.stored_parsed_info = stored_parsed_info
+        return media
+
+    def _load_deferred(self, media: MediaInfo, column: str) -> Any:
+        if column == "parsed_info" and media.stored_parsed_info is not None:
+            return media.stored_parsed_info
+        value = self.load_media_column(media.media_id, column)
+        if column == "parsed_info" and value is not None and self.cache_shared:
+            media.stored_parsed_info = value
+            self.cache.set(media.media_id, media, media.expiration)
+        return value
 
     def get_connection(self) -> sqlite3.Connection:
-        """Get a new database connection.
+        """Open a new database connection.
+
+        Connections may be used from any thread, one at a time, so that the
+        pool can hand them to whichever request thread needs one.
 
         Returns:
             sqlite3.Connection: A new database connection with Row factory
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.busy_timeout / 1000, check_same_thread=False
+        )
         conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma} = {self.profile[pragma]}")
+        return conn
+
+    @property
+    def fsync_uploads(self) -> bool:
+        """Whether uploaded files should be fsynced before their row is saved."""
+        return self.profile["fsync_uploads"]
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for one transaction.
+
+        Uses the connection bound to the current thread by bind_connection
+        if there is one, and a pooled connection otherwise. The transaction
+        is committed on success and rolled back on error.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with conn:
+                yield conn
+            return
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.pool.release(conn)
+
+    def transaction(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        """Run work(conn) in a write transaction, retrying it while locked.
+
+        The transaction starts with BEGIN IMMEDIATE so that it waits for the
+        write lock up front instead of failing when a read is upgraded.
+        If the lock cannot be had within the busy timeout, the whole
+        transaction is retried up to busy_retries times with jittered
+        exponential backoff before the error is raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.connection() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    return work(conn)
+            except sqlite3.OperationalError as e:
+                if attempt >= self.busy_retries or not _is_busy(e):
+                    raise
+                delay = min(BUSY_BACKOFF_MAX, BUSY_BACKOFF * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+
+    def bind_connection(self) -> sqlite3.Connection:
+        """Take a pooled connection and use it for every call on this thread."""
+        conn = self.pool.acquire()
+        self._local.conn = conn
         return conn
 
+    def release_connection(self, conn: sqlite3.Connection) -> None:
+        """Unbind a connection from bind_connection and return it to the pool."""
+        if getattr(self._local, "conn", None) is conn:
+            self._local.conn = None
+        self.pool.release(conn)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters of the data access layer, e.g. for a metrics endpoint."""
+        metrics = {"cache": self.cache.stats(), "single_flight": self.flights.stats()}
+        if self.id_filter is not None:
+            metrics["id_filter"] = {
+                "ids": self.id_filter.bloom.count,
+                "capacity": self.id_filter.bloom.capacity,
+                "expirations": len(self.id_filter.expirations),
+                "rejected": self.id_filter_rejected,
+            }
+        return metrics
+
+    def close(self) -> None:
+        """Commit queued saves and close the pooled connections."""
+        if self.writer is not None:
+            self.writer.close()
+        self._unlink_pool.shutdown()
+        self.pool.close()
+        with self._sync_lock:
+            if self._filter_conn is not None:
+                self._filter_conn.close()
+                self._filter_conn = None
+
+    def sync_id_filter(self) -> None:
+        """Load the ID filter, or catch it up with rows written elsewhere."""
+        if not self.id_filter_enabled:
+            return
+        try:
+            self._sync_id_filter(force=True)
+        except sqlite3.Error as e:
+            print(f"Database error while loading the ID filter: {str(e)}")
+
+    def _sync_id_filter(self, force: bool = False) -> bool:
+        """Bring the ID filter up to date with the database file.
+
+        PRAGMA data_version on a dedicated connection tells whether any
+        other connection, in this process or another, committed since the
+        last sync. New rows are then read past the highest seq already
+        loaded (see _init_sequence). Unless forced, the check runs at most
+        once per ID_FILTER_SYNC_MS, and is skipped while another thread is
+        already syncing. Rows are read outside _filter_lock; a rebuilt
+        filter is swapped in once complete.
+
+        Returns:
+            bool: True if the database had changed
+        """
+        with self._filter_lock:
+            now = time.monotonic()
+            if not force and self.id_filter is not None and now < self._filter_next_sync:
+                return False
+            self._filter_next_sync = now + self.id_filter_sync_interval
+        if not self._sync_lock.acquire(blocking=False):
+            return False
+        try:
+            if self._filter_conn is None:
+                self._filter_conn = self.get_connection()
+            conn = self._filter_conn
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            id_filter = self.id_filter
+            rebuild = id_filter is None or id_filter.full
+            if not rebuild and version == self._filter_version:
+                return False
+            if rebuild:
+                count = conn.execute("SELECT count(*) FROM media_info").fetchone()[0]
+                id_filter = MediaIdFilter(max(2 * count, 100000), self.id_filter_error_rate)
+                watermark = 0
+                for seq, media_id, expiration in conn.execute(
+                    "SELECT seq, id, expiration FROM media_info"
+                ):
+                    id_filter.add(media_id, _timestamp(expiration))
+                    if seq is not None and seq > watermark:
+                        watermark = seq
+                with self._filter_lock:
+                    self.id_filter = id_filter
+                    # Saves made during the scan went to the old filter
+                    self._filter_next_sync = 0.0
+                    self._expired_checked.clear()
+                self._filter_watermark = watermark
+                self._filter_version = version
+                return True
+            rows = conn.execute(
+                "SELECT seq, id, expiration FROM media_info WHERE seq > ? ORDER BY seq",
+                (self._filter_watermark,),
+            ).fetchall()
+            with self._filter_lock:
+                for seq, media_id, expiration in rows:
+                    id_filter.add(media_id, _timestamp(expiration))
+                self._expired_checked.clear()
+            if rows:
+                self._filter_watermark = rows[-1][0]
+            self._filter_version = version
+            return True
+        finally:
+            self._sync_lock.release()
+
+    def _may_exist(self, media_id: str) -> bool:
+        """Check the ID filter before looking an entry up.
+
+        An ID the filter does not know, or one it knows to be expired, is
+        rejected without reading media_info. An expiration in the filter is
+        only trusted once a read has confirmed it since the last change to
+        the database, as another process may have extended it. An entry
+        saved by another process can be rejected for up to
+        ID_FILTER_SYNC_MS after it was saved.
+        """
+        if not self.id_filter_enabled:
+            return True
+        try:
+            if self.id_filter is None:
+                self._sync_id_filter(force=True)
+            with self._filter_lock:
+                if self.id_filter is None:
+                    # Still being built by another thread
+                    return True
+                state = self.id_filter.state(media_id)
+            if state == LIVE:
+                return True
+            if self._sync_id_filter():
+                with self._filter_lock:
+                    state = self.id_filter.state(media_id)
+        except sqlite3.Error as e:
+            print(f"Database error while checking the ID filter: {str(e)}")
+            return True
+        with self._filter_lock:
+            if state == LIVE or (state == EXPIRED and media_id not in self._expired_checked):
+                return True
+            self.id_filter_rejected += 1
+            return False
+
+    def _filter_seen(self, media_id: str, media: Optional[MediaInfo]) -> None:
+        """Record what a read found in media_info for an ID."""
+        with self._filter_lock:
+            if self.id_filter is None:
+                return
+            if media is None:
+                self.id_filter.discard(media_id)
+                self._expired_checked.add(media_id)
+                return
+            self.id_filter.add(media_id, _timestamp(media.expiration))
+            if media.expiration and media.expiration <= datetime.now():
+                self._expired_checked.add(media_id)
+
     def init_db(self) -> None:
         """Initialize database with required tables."""
-        with self.get_connection() as conn:
+        with self.connection() as conn:
+            conn.execute(f"PRAGMA journal_mode = {self.profile['journal_mode']}")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS media_info (
@@ -58,69 +587,316 @@ class Database:
                     expiration TIMESTAMP,
                     password TEXT,
                     raw_output TEXT,
-                    parsed_info TEXT
+                    parsed_info TEXT,
+                    collection_id TEXT,
+                    parsed_blob BLOB,
+                    missing_file INTEGER NOT NULL DEFAULT 0,
+                    seq INTEGER
+                )
+            """
+            )
+            self._add_missing_columns(conn, {
+                "collection_id": "TEXT",
+                "parsed_blob": "BLOB",
+                "missing_file": "INTEGER NOT NULL DEFAULT 0",
+                "seq": "INTEGER",
+            })
+            self._init_sequence(conn)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS imported_files (
+                    path TEXT PRIMARY KEY,
+                    media_id TEXT NOT NULL,
+                    imported_on TIMESTAMP NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_media_info_collection
+                ON media_info (collection_id)
+                WHERE collection_id IS NOT NULL
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_media_info_expiration
+                ON media_info (expiration)
+                WHERE expiration IS NOT NULL
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_media_info_filename
+                ON media_info (filename)
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_state (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
                 )
             """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """
+            )
+            self._init_languages(conn)
+
+    @staticmethod
+    def _init_languages(conn: sqlite3.Connection) -> None:
+        """Create the language index table.
+
+        Entries saved before it existed are indexed by
+        `migrate.py languages`.
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media_languages (
+                media_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                code TEXT NOT NULL,
+                PRIMARY KEY (code, kind, media_id)
+            ) WITHOUT ROWID
+        """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_media_languages_media
+            ON media_languages (media_id)
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_media_info_delete_languages
+            AFTER DELETE ON media_info
+            BEGIN
+                DELETE FROM media_languages WHERE media_id = OLD.id;
+            END
+        """
+        )
+
+    @staticmethod
+    def _init_sequence(conn: sqlite3.Connection) -> None:
+        """Number new entries from a counter that deletes never lower.
+
+        Unlike rowid, which SQLite hands out again once the newest row is
+        deleted, seq only grows, so the ID filter can catch up with new
+        entries by reading past the highest seq it has seen. Entries saved
+        before the column existed have none and are only read when the
+        filter is rebuilt.
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sequences (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """
+        )
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO sequences (name, value)
+            SELECT 'media_info', coalesce(max(rowid), 0) FROM media_info
+        """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_media_info_seq
+            ON media_info (seq)
+            WHERE seq IS NOT NULL
+        """
+        )
+        # Numbers rows inserted without one, e.g. by add_media_info
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_media_info_seq
+            AFTER INSERT ON media_info
+            WHEN NEW.seq IS NULL
+            BEGIN
+                UPDATE sequences SET value = value + 1 WHERE name = 'media_info';
+                UPDATE media_info
+                SET seq = (SELECT value FROM sequences WHERE name = 'media_info')
+                WHERE rowid = NEW.rowid;
+            END
+        """
+        )
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection, columns: Dict[str, str]) -> None:
+        """Add columns introduced after a database file was first created."""
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(media_info)")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE media_info ADD COLUMN {name} {column_type}")
+
+    def _encode_parsed_info(self, media: MediaInfo) -> tuple:
+        """Encode parsed_info as the (parsed_info, parsed_blob) column pair."""
+        document = media.parsed_info_document()
+        if self.parsed_info_encoding == "json":
+            parsed_info, parsed_blob = codec.dumps(document), None
+        else:
+            parsed_info, parsed_blob = None, compact.encode(document)
+        if self.cache_shared:
+            # Cached by save_media_infos along with the row, as stored
+            media.stored_parsed_info = parsed_blob or parsed_info
+        return parsed_info, parsed_blob
+
+    def _media_row(self, media: MediaInfo) -> tuple:
+        """Build the media_info row values for a MediaInfo object."""
+        return (
+            media.media_id,
+            media.filename,
+            media.original_filename,
+            media.uploaded_on.isoformat(),
+            media.expiration.isoformat() if media.expiration else None,
+            media.password,
+            media.raw_output,
+            *self._encode_parsed_info(media),
+            media.collection_id,
+        )
+
+    @staticmethod
+    def _language_rows(media: MediaInfo) -> Set[tuple]:
+        """Build the media_languages rows (media_id, kind, code) of an entry."""
+        rows = set()
+        for kind, tracks in (("audio", media.audio), ("subtitle", media.subtitles)):
+            for track in tracks:
+                code = track.language_code or resolve_language(track.language)[0]
+                if code:
+                    rows.add((media.media_id, kind, code))
+        return rows
 
     def save_media_info(self, media: MediaInfo) -> bool:
         """Save media information to database."""
+        return self.save_media_infos([media])
+
+    def save_media_infos(
+        self,
+        medias: Iterable[MediaInfo],
+        imported_files: Optional[Iterable[tuple]] = None,
+    ) -> bool:
+        """Save several media entries in a single transaction.
+
+        With group commit enabled (DB_GROUP_COMMIT_MS), the entries are
+        handed to the writer thread and may share their transaction with
+        other saves; this call still returns only once they are committed.
+
+        Args:
+            medias (Iterable[MediaInfo]): Entries to insert
+            imported_files (Iterable[tuple], optional): (path, media_id) pairs
+                recorded in the bulk import journal in the same transaction
+
+        Returns:
+            bool: True if every entry was saved, False if none were
+        """
+        medias = list(medias)
+        imported_files = list(imported_files) if imported_files else None
+        if self.writer is not None:
+            saved = self.writer.submit(medias, imported_files)
+        else:
+            saved = self.write_media_infos(medias, imported_files)
+        if saved:
+            for media in medias:
+                self.cache.set(media.media_id, media, media.expiration)
+            with self._filter_lock:
+                if self.id_filter is not None:
+                    for media in medias:
+                        self.id_filter.add(media.media_id, _timestamp(media.expiration))
+        return saved
+
+    def write_media_infos(
+        self, medias: List[MediaInfo], imported_files: Optional[List[tuple]] = None
+    ) -> bool:
+        """Save media entries in a transaction of their own."""
         try:
-            with self.get_connection() as conn:
-                conn.execute(
-                    """
-                    INSERT INTO media_info (
-                        id, filename, original_filename, uploaded_on, 
-                        expiration, password, raw_output, parsed_info
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        media.media_id,
-                        media.filename,
-                        media.original_filename,
-                        media.uploaded_on.isoformat(),
-                        media.expiration.isoformat() if media.expiration else None,
-                        media.password,
-                        media.raw_output,
-                        json.dumps({
-                            "general": media.general.__dict__,
-                            "video": {
-                                **media.video.__dict__,
-                            },
-                            "audio": [track.__dict__ for track in media.audio],
-                            "subtitles": [sub.__dict__ for sub in media.subtitles]
-                        })
-                    ),
-                )
+            self.transaction(
+                lambda conn: self.insert_media_infos(conn, medias, imported_files)
+            )
             return True
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
             return False
 
+    def insert_media_infos(
+        self,
+        conn: sqlite3.Connection,
+        medias: List[MediaInfo],
+        imported_files: Optional[List[tuple]] = None,
+    ) -> None:
+        """Insert media entries within the caller's transaction."""
+        last_seq = conn.execute(
+            "UPDATE sequences SET value = value + ? WHERE name = 'media_info' RETURNING value",
+            (len(medias),),
+        ).fetchone()[0]
+        first_seq = last_seq - len(medias) + 1
+        conn.executemany(
+            """
+            INSERT INTO media_info (
+                id, filename, original_filename, uploaded_on,
+                expiration, password, raw_output, parsed_info,
+                parsed_blob, collection_id, seq
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            [
+                (*self._media_row(media), first_seq + i)
+                for i, media in enumerate(medias)
+            ],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO media_languages (media_id, kind, code) "
+            "VALUES (?, ?, ?)",
+            [row for media in medias for row in self._language_rows(media)],
+        )
+        if imported_files:
+            now = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT OR REPLACE INTO imported_files (path, media_id, imported_on) "
+                "VALUES (?, ?, ?)",
+                [(path, media_id, now) for path, media_id in imported_files],
+            )
+
     def get_media_info(self, media_id: str) -> Optional[MediaInfo]:
-        """Get media info by ID."""
+        """Get media info by ID.
+
+        Only the small columns are read here; raw_output and parsed_info are
+        fetched by load_media_column the first time the entry needs them.
+        Loaded entries are kept in the cache, up to their expiration, and
+        concurrent cache misses for one ID share a single load.
+        """
+        media = self.cache.get(media_id)
+        if media is not None:
+            return media
+        return self.flights.do(media_id, lambda: self._load_media_info(media_id))
+
+    def _load_media_info(self, media_id: str) -> Optional[MediaInfo]:
+        """Read an entry from media_info and cache it."""
+        if not self._may_exist(media_id):
+            return None
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT * FROM media_info WHERE id = ?", (media_id,)
-                )
-                row = cursor.fetchone()
+            with self.connection() as conn:
+                row = conn.execute(
+                    """
+                    SELECT id, filename, original_filename, uploaded_on,
+                           expiration, password, collection_id
+                    FROM media_info WHERE id = ?
+                """,
+                    (media_id,),
+                ).fetchone()
                 if not row:
+                    self._filter_seen(media_id, None)
                     return None
-
-                columns = [description[0] for description in cursor.description]
-                row_dict = dict(zip(columns, row))
-
-                if row_dict.get("parsed_info"):
-                    try:
-                        parsed_info = json.loads(row_dict["parsed_info"])
-                        row_dict["parsed"] = parsed_info
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing JSON data: {str(e)}")
-                        row_dict["parsed"] = {}
-
-                return MediaInfo.from_dict(row_dict)
+                media = self._deferred_media(dict(row))
+            self._filter_seen(media_id, media)
+            self.cache.set(media_id, media, media.expiration)
+            return media
         except sqlite3.Error as e:
             print(f"Database error while getting media info: {str(e)}")
             return None
@@ -128,41 +904,399 @@ class Database:
             print(f"Data structure error while getting media info: {str(e)}")
             return None
 
-    def delete_expired_media(self) -> int:
-        """Delete expired media entries and their files.
+    def load_media_column(self, media_id: str, column: str) -> Optional[str]:
+        """Read one of the heavy columns (raw_output, parsed_info) of an entry.
+
+        parsed_info comes back as compact bytes or JSON text, whichever the
+        row was stored with.
+        """
+        if column not in ("raw_output", "parsed_info"):
+            raise ValueError(f"Not a deferred column: {column}")
+        return self.flights.do(
+            (media_id, column), lambda: self._load_media_column(media_id, column)
+        )
+
+    def _load_media_column(self, media_id: str, column: str) -> Optional[str]:
+        columns = "parsed_blob, parsed_info" if column == "parsed_info" else column
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    f"SELECT {columns} FROM media_info WHERE id = ?", (media_id,)
+                ).fetchone()
+                if not row:
+                    return None
+                return row[0] if row[0] is not None else row[-1]
+        except sqlite3.Error as e:
+            print(f"Database error while loading {column}: {str(e)}")
+            return None
+
+    def migrate_parsed_info(self, encoding: str, batch_size: int = 500) -> int:
+        """Convert stored parsed_info values to the given encoding.
+
+        Args:
+            encoding (str): "binary" to move JSON rows into parsed_blob,
+                "json" to move them back into parsed_info
+            batch_size (int): Rows converted per transaction
 
         Returns:
-            int: Number of entries deleted
+            int: Number of rows converted
         """
+        if encoding == "json":
+            source, target = "parsed_blob", "parsed_info"
+        else:
+            source, target = "parsed_info", "parsed_blob"
+        converted = 0
+        last_rowid = 0
         try:
-            with self.get_connection() as conn:
-                # Get expired entries
-                cursor = conn.execute(
-                    "SELECT filename FROM media_info WHERE expiration < ?",
-                    (datetime.now().isoformat(),),
+            while True:
+                with self.connection() as conn:
+                    rows = conn.execute(
+                        f"""
+                        SELECT rowid, {source} FROM media_info
+                        WHERE rowid > ? AND {source} IS NOT NULL AND {target} IS NULL
+                        ORDER BY rowid LIMIT ?
+                    """,
+                        (last_rowid, batch_size),
+                    ).fetchall()
+                    if not rows:
+                        return converted
+                    updates = []
+                    for rowid, value in rows:
+                        try:
+                            if encoding == "json":
+                                document = codec.dumps(compact.decode(value))
+                            else:
+                                document = compact.encode(codec.loads(value))
+                        except (ValueError, TypeError, AttributeError) as e:
+                            print(f"Skipping row {rowid}: {str(e)}")
+                            continue
+                        updates.append((document, rowid))
+                    conn.executemany(
+                        f"UPDATE media_info SET {target} = ?, {source} = NULL WHERE rowid = ?",
+                        updates,
+                    )
+                    converted += len(updates)
+                    last_rowid = rows[-1][0]
+        except sqlite3.Error as e:
+            print(f"Database error while migrating parsed_info: {str(e)}")
+            return converted
+
+    def index_languages(self, batch_size: int = 500) -> int:
+        """Rebuild the media_languages rows of every stored entry.
+
+        Needed once for entries saved before the table existed, and again
+        whenever languages.py resolves some values differently.
+
+        Args:
+            batch_size (int): Entries indexed per transaction
+
+        Returns:
+            int: Number of entries indexed
+        """
+        indexed = 0
+        last_rowid = 0
+
+        def index_batch(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+            rows = conn.execute(
+                """
+                SELECT rowid, id, parsed_info, parsed_blob FROM media_info
+                WHERE rowid > ? ORDER BY rowid LIMIT ?
+            """,
+                (last_rowid, batch_size),
+            ).fetchall()
+            for row in rows:
+                try:
+                    media = MediaInfo.from_dict(
+                        {key: row[key] for key in ("id", "parsed_info", "parsed_blob")}
+                    )
+                    language_rows = self._language_rows(media)
+                except (ValueError, TypeError, KeyError) as e:
+                    print(f"Skipping entry {row['id']}: {str(e)}")
+                    continue
+                conn.execute("DELETE FROM media_languages WHERE media_id = ?", (row["id"],))
+                conn.executemany(
+                    "INSERT INTO media_languages (media_id, kind, code) VALUES (?, ?, ?)",
+                    language_rows,
                 )
-                expired_files = cursor.fetchall()
-
-                # Delete files
-                for file in expired_files:
-                    file_path = os.path.join(self.media_folder, file["filename"])
-                    try:
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                    except OSError as e:
-                        print(f"Error deleting file {file_path}: {str(e)}")
-
-                # Delete database entries
-                cursor = conn.execute(
-                    "DELETE FROM media_info WHERE expiration < ?",
-                    (datetime.now().isoformat(),),
+            return rows
+
+        try:
+            while True:
+                rows = self.transaction(index_batch)
+                if not rows:
+                    return indexed
+                indexed += len(rows)
+                last_rowid = rows[-1]["rowid"]
+        except sqlite3.Error as e:
+            print(f"Database error while indexing languages: {str(e)}")
+            return indexed
+
+    def get_imported_paths(self) -> Set[str]:
+        """Get the source paths already loaded by the bulk importer."""
+        try:
+            with self.connection() as conn:
+                return {row["path"] for row in conn.execute("SELECT path FROM imported_files")}
+        except sqlite3.Error as e:
+            print(f"Database error while reading import journal: {str(e)}")
+            return set()
+
+    def get_job_state(self, name: str) -> Optional[str]:
+        """Get the saved progress of a resumable background job."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM job_state WHERE name = ?", (name,)
+                ).fetchone()
+                return row["value"] if row else None
+        except sqlite3.Error as e:
+            print(f"Database error while reading job state {name}: {str(e)}")
+            return None
+
+    def set_job_state(self, name: str, value: str) -> None:
+        """Save the progress of a resumable background job."""
+        try:
+            self.transaction(lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO job_state (name, value) VALUES (?, ?)", (name, value)
+            ))
+        except sqlite3.Error as e:
+            print(f"Database error while saving job state {name}: {str(e)}")
+
+    def get_known_filenames(self, filenames: Iterable[str], chunk_size: int = 500) -> Set[str]:
+        """Get which of the given upload filenames belong to an entry.
+
+        Database errors are raised rather than reported: an empty result
+        would make every file look orphaned.
+        """
+        filenames = list(filenames)
+        known = set()
+        with self.connection() as conn:
+            for start in range(0, len(filenames), chunk_size):
+                chunk = filenames[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                known.update(
+                    row["filename"] for row in conn.execute(
+                        f"SELECT filename FROM media_info WHERE filename IN ({placeholders})",
+                        chunk,
+                    )
                 )
-                deleted_count = cursor.rowcount
+        return known
 
-                return deleted_count
+    def get_file_rows(self, after_rowid: int, limit: int) -> List[sqlite3.Row]:
+        """Get (rowid, filename, missing_file) of the entries past a rowid."""
+        with self.connection() as conn:
+            return conn.execute(
+                """
+                SELECT rowid, filename, missing_file FROM media_info
+                WHERE rowid > ? ORDER BY rowid LIMIT ?
+            """,
+                (after_rowid, limit),
+            ).fetchall()
+
+    def set_missing_files(self, flags: Iterable[tuple]) -> None:
+        """Store (missing_file, rowid) flags found by the reconciliation job."""
+        flags = list(flags)
+        if flags:
+            self.transaction(lambda conn: conn.executemany(
+                "UPDATE media_info SET missing_file = ? WHERE rowid = ?", flags
+            ))
+
+    def get_collection(self, collection_id: str) -> List[MediaInfo]:
+        """Get every media entry uploaded together under a collection ID."""
+        try:
+            with self.connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, filename, original_filename, uploaded_on,
+                           expiration, password, parsed_info, parsed_blob, collection_id
+                    FROM media_info WHERE collection_id = ? ORDER BY rowid
+                """,
+                    (collection_id,),
+                ).fetchall()
+                return [MediaInfo.from_dict(dict(row)) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error while getting collection: {str(e)}")
+            return []
+        except (KeyError, TypeError) as e:
+            print(f"Data structure error while getting collection: {str(e)}")
+            return []
+
+    def find_media_by_language(
+        self, language: str, kind: Optional[str] = None, limit: int = 100
+    ) -> List[MediaInfo]:
+        """Find unexpired entries with an audio or subtitle track in a language.
+
+        Args:
+            language (str): Language name, ISO 639 code or BCP 47 tag
+            kind (str, optional): "audio" or "subtitle" to match one track type
+            limit (int): Maximum number of entries returned, newest first
+
+        Returns:
+            List[MediaInfo]: Matching entries without their raw output
+        """
+        code = resolve_language(language)[0]
+        if not code:
+            return []
+        query = """
+            SELECT id, filename, original_filename, uploaded_on,
+                   expiration, password, parsed_info, parsed_blob, collection_id
+            FROM media_info
+            WHERE id IN (
+                SELECT media_id FROM media_languages
+                WHERE code = ?""" + (" AND kind = ?" if kind else "") + """
+            )
+            AND (expiration IS NULL OR expiration > ?)
+            ORDER BY uploaded_on DESC LIMIT ?
+        """
+        params = [code] + ([kind] if kind else []) + [datetime.now().isoformat(), limit]
+        try:
+            with self.connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+                return [MediaInfo.from_dict(dict(row)) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error while searching by language: {str(e)}")
+            return []
+        except (KeyError, TypeError) as e:
+            print(f"Data structure error while searching by language: {str(e)}")
+            return []
+
+    def delete_expired_media(
+        self, chunk_size: Optional[int] = None, time_budget: Optional[float] = None
+    ) -> int:
+        """Delete expired media entries and their files.
+
+        Rows are deleted in chunks of chunk_size, each in its own short
+        transaction, until none are left, time_budget seconds have passed
+        or CLEANUP_MAX_ROWS rows were deleted. Whatever remains is left for
+        the next pass. Files are unlinked by a small thread pool once
+        their rows are committed.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        chunk_size = chunk_size or self.cleanup_chunk_size
+        if time_budget is None:
+            time_budget = self.cleanup_time_budget
+        deadline = time.monotonic() + time_budget
+        now = datetime.now().isoformat()
+
+        def delete(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+            return conn.execute(
+                """
+                DELETE FROM media_info WHERE rowid IN (
+                    SELECT rowid FROM media_info
+                    WHERE expiration < ?
+                    ORDER BY expiration LIMIT ?
+                )
+                RETURNING id, filename
+            """,
+                (now, chunk_size),
+            ).fetchall()
+
+        deleted = 0
+        unlinks = []
+        try:
+            while deleted < self.cleanup_max_rows:
+                rows = self.transaction(delete)
+                for row in rows:
+                    self.cache.invalidate(row["id"])
+                    self._filter_seen(row["id"], None)
+                    unlinks.append(self._remove_file_later(row["filename"]))
+                deleted += len(rows)
+                if len(rows) < chunk_size or time.monotonic() >= deadline:
+                    break
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
-            return 0
+        futures.wait(unlinks)
+        return deleted
+
+    def _remove_file(self, filename: str) -> None:
+        """Delete an uploaded file, reporting rather than raising errors."""
+        try:
+            self.uploads.remove(filename)
+        except OSError as e:
+            print(f"Error deleting file {filename}: {str(e)}")
+
+    def _remove_file_later(self, filename: str) -> futures.Future:
+        """Delete an uploaded file on the unlink thread pool."""
+        return self._unlink_pool.submit(self._remove_file, filename)
+
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew a named lease shared by every process using the file.
+
+        The lease is granted if it is free, expired or already held by
+        holder, and then lasts ttl seconds.
+
+        Returns:
+            bool: True if holder now holds the lease
+        """
+        now = time.time()
+
+        def acquire(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+            return conn.execute(
+                """
+                INSERT INTO leases (name, holder, expires) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE
+                SET holder = excluded.holder, expires = excluded.expires
+                WHERE leases.holder = excluded.holder OR leases.expires < ?
+                RETURNING holder
+            """,
+                (name, holder, now + ttl, now),
+            ).fetchone()
+
+        try:
+            return self.transaction(acquire) is not None
+        except sqlite3.Error as e:
+            print(f"Database error while acquiring lease {name}: {str(e)}")
+            return False
+
+    def release_lease(self, name: str, holder: str) -> None:
+        """Give up a lease so that another process can take it at once."""
+        try:
+            self.transaction(lambda conn: conn.execute(
+                "DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder)
+            ))
+        except sqlite3.Error as e:
+            print(f"Database error while releasing lease {name}: {str(e)}")
+
+    def next_expiration(self) -> Optional[datetime]:
+        """Get the earliest expiration of any entry."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    """
+                    SELECT expiration FROM media_info
+                    WHERE expiration IS NOT NULL
+                    ORDER BY expiration LIMIT 1
+                """
+                ).fetchone()
+                return datetime.fromisoformat(row["expiration"]) if row else None
+        except sqlite3.Error as e:
+            print(f"Database error while reading the next expiration: {str(e)}")
+            return None
+
+    def delete_media(self, media_id: str) -> bool:
+        """Delete a single entry and its file.
+
+        Returns:
+            bool: True if the entry was deleted
+        """
+        def delete(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+            return conn.execute(
+                "DELETE FROM media_info WHERE id = ? RETURNING filename",
+                (media_id,),
+            ).fetchall()
+
+        try:
+            rows = self.transaction(delete)
+        except sqlite3.Error as e:
+            print(f"Database error while deleting {media_id}: {str(e)}")
+            return False
+        self.cache.invalidate(media_id)
+        if not rows:
+            return False
+        self._filter_seen(media_id, None)
+        self._remove_file_later(rows[0]["filename"])
+        return True
 
     def update_media_info(self, media_id: str, **kwargs: Any) -> bool:
         """Update media information in database.
@@ -187,16 +1321,39 @@ class Database:
         if not update_fields:
             return False
 
+        placeholders = ", ".join(f"{k} = ?" for k in update_fields)
+        if "parsed_info" in update_fields:
+            placeholders += ", parsed_blob = NULL"
+        query = f"UPDATE media_info SET {placeholders} WHERE id = ?"
+        values = list(update_fields.values()) + [media_id]
+
+        def update(conn: sqlite3.Connection) -> int:
+            updated = conn.execute(query, values).rowcount
+            if "parsed_info" in update_fields:
+                media = MediaInfo.from_dict(
+                    {"id": media_id, "parsed_info": update_fields["parsed_info"]}
+                )
+                conn.execute("DELETE FROM media_languages WHERE media_id = ?", (media_id,))
+                conn.executemany(
+                    "INSERT INTO media_languages (media_id, kind, code) VALUES (?, ?, ?)",
+                    self._language_rows(media),
+                )
+            return updated
+
         try:
-            with self.get_connection() as conn:
-                placeholders = ", ".join(f"{k} = ?" for k in update_fields)
-                query = f"UPDATE media_info SET {placeholders} WHERE id = ?"
-                values = list(update_fields.values()) + [media_id]
-                conn.execute(query, values)
-                return True
+            updated = self.transaction(update)
+            if updated:
+                with self._filter_lock:
+                    if self.id_filter is not None:
+                        # Look the entry up again to learn its new expiration
+                        self.id_filter.add(media_id)
+                        self._expired_checked.discard(media_id)
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
             return False
+        finally:
+            self.cache.invalidate(media_id)
 
 
 def get_db():
@@ -0,0 +1,100 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+In-memory index of live media IDs, used to turn away unknown and expired
+links without querying the database.
+"""
+
+import math
+import time
+from hashlib import blake2b
+from typing import Dict, Optional, Tuple
+
+LIVE = "live"
+UNKNOWN = "unknown"
+EXPIRED = "expired"
+
+
+def _hashes(media_id: str) -> Tuple[int, int]:
+    digest = int.from_bytes(blake2b(media_id.encode(), digest_size=16).digest(), "little")
+    return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over pre-computed 64-bit hash pairs"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, hashes: Tuple[int, int]):
+        first, second = hashes
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, hashes: Tuple[int, int]) -> None:
+        """Set the bits of an item"""
+        for position in self._positions(hashes):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        for position in self._positions(hashes):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class MediaIdFilter:
+    """Bloom filter of media IDs plus the expiration time of each one.
+
+    Expirations are kept by 64-bit ID hash rather than by ID. An entry
+    deleted from the database is kept as expired, since a Bloom filter
+    cannot forget it; both are dropped when the filter is rebuilt.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.expirations: Dict[int, float] = {}
+
+    @property
+    def full(self) -> bool:
+        """Whether more IDs were added than the filter was sized for"""
+        return self.bloom.count > self.bloom.capacity
+
+    def add(self, media_id: str, expires_at: Optional[float] = None) -> None:
+        """Record a live ID and its expiration as a Unix timestamp"""
+        hashes = _hashes(media_id)
+        if hashes not in self.bloom:
+            self.bloom.add(hashes)
+        if expires_at is not None:
+            self.expirations[hashes[0]] = expires_at
+        else:
+            self.expirations.pop(hashes[0], None)
+
+    def discard(self, media_id: str) -> None:
+        """Mark an ID as deleted"""
+        self.expirations[_hashes(media_id)[0]] = 0.0
+
+    def state(self, media_id: str) -> str:
+        """LIVE if the ID may exist, UNKNOWN or EXPIRED if it cannot be served"""
+        hashes = _hashes(media_id)
+        if hashes not in self.bloom:
+            return UNKNOWN
+        expires_at = self.expirations.get(hashes[0])
+        if expires_at is not None and expires_at <= time.time():
+            return EXPIRED
+        return LIVE
@@ -0,0 +1,356 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+ISO 639 language table used to normalize MediaInfo language values.
+
+MediaInfo writes languages as English names in text output ("Japanese",
+"Portuguese (BR)") and as BCP 47 tags in JSON/XML output ("ja", "pt-BR").
+resolve_language maps any of these to a normalized ISO 639 code and the
+flag of the language's region.
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Tuple
+
+
+class Language(NamedTuple):
+    """One row of the language table"""
+    code: str
+    iso639_2b: str
+    iso639_2t: str
+    name: str
+    region: str
+
+
+# (ISO 639-1, ISO 639-2/B, ISO 639-2/T and ISO 639-3, names separated by ";", region)
+# The ISO 639-3 code of every language below equals its ISO 639-2/T code.
+_LANGUAGE_ROWS = (
+    ("aa", "aar", "aar", "Afar", "DJ"),
+    ("ab", "abk", "abk", "Abkhazian;Abkhaz", "GE"),
+    ("ae", "ave", "ave", "Avestan", ""),
+    ("af", "afr", "afr", "Afrikaans", "ZA"),
+    ("ak", "aka", "aka", "Akan", "GH"),
+    ("am", "amh", "amh", "Amharic", "ET"),
+    ("an", "arg", "arg", "Aragonese", "ES"),
+    ("ar", "ara", "ara", "Arabic", "SA"),
+    ("as", "asm", "asm", "Assamese", "IN"),
+    ("av", "ava", "ava", "Avaric;Avar", "RU"),
+    ("ay", "aym", "aym", "Aymara", "BO"),
+    ("az", "aze", "aze", "Azerbaijani;Azeri", "AZ"),
+    ("ba", "bak", "bak", "Bashkir", "RU"),
+    ("be", "bel", "bel", "Belarusian;Byelorussian", "BY"),
+    ("bg", "bul", "bul", "Bulgarian", "BG"),
+    ("bi", "bis", "bis", "Bislama", "VU"),
+    ("bm", "bam", "bam", "Bambara", "ML"),
+    ("bn", "ben", "ben", "Bengali;Bangla", "BD"),
+    ("bo", "tib", "bod", "Tibetan", "CN"),
+    ("br", "bre", "bre", "Breton", "FR"),
+    ("bs", "bos", "bos", "Bosnian", "BA"),
+    ("ca", "cat", "cat", "Catalan;Valencian", "ES"),
+    ("ce", "che", "che", "Chechen", "RU"),
+    ("ch", "cha", "cha", "Chamorro", "GU"),
+    ("co", "cos", "cos", "Corsican", "FR"),
+    ("cr", "cre", "cre", "Cree", "CA"),
+    ("cs", "cze", "ces", "Czech", "CZ"),
+    ("cu", "chu", "chu", "Church Slavic;Church Slavonic;Old Church Slavonic", ""),
+    ("cv", "chv", "chv", "Chuvash", "RU"),
+    ("cy", "wel", "cym", "Welsh", "GB"),
+    ("da", "dan", "dan", "Danish", "DK"),
+    ("de", "ger", "deu", "German", "DE"),
+    ("dv", "div", "div", "Divehi;Dhivehi;Maldivian", "MV"),
+    ("dz", "dzo", "dzo", "Dzongkha", "BT"),
+    ("ee", "ewe", "ewe", "Ewe", "GH"),
+    ("el", "gre", "ell", "Greek;Modern Greek", "GR"),
+    ("en", "eng", "eng", "English", "US"),
+    ("eo", "epo", "epo", "Esperanto", ""),
+    ("es", "spa", "spa", "Spanish;Castilian;Latin American Spanish", "ES"),
+    ("et", "est", "est", "Estonian", "EE"),
+    ("eu", "baq", "eus", "Basque", "ES"),
+    ("fa", "per", "fas", "Persian;Farsi", "IR"),
+    ("ff", "ful", "ful", "Fulah;Fula", "SN"),
+    ("fi", "fin", "fin", "Finnish", "FI"),
+    ("fj", "fij", "fij", "Fijian", "FJ"),
+    ("fo", "fao", "fao", "Faroese", "FO"),
+    ("fr", "fre", "fra", "French", "FR"),
+    ("fy", "fry", "fry", "Western Frisian;Frisian", "NL"),
+    ("ga", "gle", "gle", "Irish", "IE"),
+    ("gd", "gla", "gla", "Scottish Gaelic;Gaelic", "GB"),
+    ("gl", "glg", "glg", "Galician", "ES"),
+    ("gn", "grn", "grn", "Guarani", "PY"),
+    ("gu", "guj", "guj", "Gujarati", "IN"),
+    ("gv", "glv", "glv", "Manx", "IM"),
+    ("ha", "hau", "hau", "Hausa", "NG"),
+    ("he", "heb", "heb", "Hebrew", "IL"),
+    ("hi", "hin", "hin", "Hindi", "IN"),
+    ("ho", "hmo", "hmo", "Hiri Motu", "PG"),
+    ("hr", "hrv", "hrv", "Croatian", "HR"),
+    ("ht", "hat", "hat", "Haitian;Haitian Creole", "HT"),
+    ("hu", "hun", "hun", "Hungarian", "HU"),
+    ("hy", "arm", "hye", "Armenian", "AM"),
+    ("hz", "her", "her", "Herero", "NA"),
+    ("ia", "ina", "ina", "Interlingua", ""),
+    ("id", "ind", "ind", "Indonesian", "ID"),
+    ("ie", "ile", "ile", "Interlingue;Occidental", ""),
+    ("ig", "ibo", "ibo", "Igbo", "NG"),
+    ("ii", "iii", "iii", "Sichuan Yi;Nuosu", "CN"),
+    ("ik", "ipk", "ipk", "Inupiaq", "US"),
+    ("io", "ido", "ido", "Ido", ""),
+    ("is", "ice", "isl", "Icelandic", "IS"),
+    ("it", "ita", "ita", "Italian", "IT"),
+    ("iu", "iku", "iku", "Inuktitut", "CA"),
+    ("ja", "jpn", "jpn", "Japanese", "JP"),
+    ("jv", "jav", "jav", "Javanese", "ID"),
+    ("ka", "geo", "kat", "Georgian", "GE"),
+    ("kg", "kon", "kon", "Kongo", "CD"),
+    ("ki", "kik", "kik", "Kikuyu;Gikuyu", "KE"),
+    ("kj", "kua", "kua", "Kuanyama;Kwanyama", "NA"),
+    ("kk", "kaz", "kaz", "Kazakh", "KZ"),
+    ("kl", "kal", "kal", "Kalaallisut;Greenlandic", "GL"),
+    ("km", "khm", "khm", "Khmer;Central Khmer", "KH"),
+    ("kn", "kan", "kan", "Kannada", "IN"),
+    ("ko", "kor", "kor", "Korean", "KR"),
+    ("kr", "kau", "kau", "Kanuri", "NG"),
+    ("ks", "kas", "kas", "Kashmiri", "IN"),
+    ("ku", "kur", "kur", "Kurdish", "IQ"),
+    ("kv", "kom", "kom", "Komi", "RU"),
+    ("kw", "cor", "cor", "Cornish", "GB"),
+    ("ky", "kir", "kir", "Kyrgyz;Kirghiz", "KG"),
+    ("la", "lat", "lat", "Latin", "VA"),
+    ("lb", "ltz", "ltz", "Luxembourgish;Letzeburgesch", "LU"),
+    ("lg", "lug", "lug", "Ganda;Luganda", "UG"),
+    ("li", "lim", "lim", "Limburgish;Limburgan", "NL"),
+    ("ln", "lin", "lin", "Lingala", "CD"),
+    ("lo", "lao", "lao", "Lao", "LA"),
+    ("lt", "lit", "lit", "Lithuanian", "LT"),
+    ("lu", "lub", "lub", "Luba-Katanga", "CD"),
+    ("lv", "lav", "lav", "Latvian", "LV"),
+    ("mg", "mlg", "mlg", "Malagasy", "MG"),
+    ("mh", "mah", "mah", "Marshallese", "MH"),
+    ("mi", "mao", "mri", "Maori", "NZ"),
+    ("mk", "mac", "mkd", "Macedonian", "MK"),
+    ("ml", "mal", "mal", "Malayalam", "IN"),
+    ("mn", "mon", "mon", "Mongolian", "MN"),
+    ("mr", "mar", "mar", "Marathi", "IN"),
+    ("ms", "may", "msa", "Malay", "MY"),
+    ("mt", "mlt", "mlt", "Maltese", "MT"),
+    ("my", "bur", "mya", "Burmese", "MM"),
+    ("na", "nau", "nau", "Nauru;Nauruan", "NR"),
+    ("nb", "nob", "nob", "Norwegian Bokmal;Norwegian Bokmål;Bokmal;Bokmål", "NO"),
+    ("nd", "nde", "nde", "North Ndebele", "ZW"),
+    ("ne", "nep", "nep", "Nepali", "NP"),
+    ("ng", "ndo", "ndo", "Ndonga", "NA"),
+    ("nl", "dut", "nld", "Dutch;Flemish", "NL"),
+    ("nn", "nno", "nno", "Norwegian Nynorsk;Nynorsk", "NO"),
+    ("no", "nor", "nor", "Norwegian", "NO"),
+    ("nr", "nbl", "nbl", "South Ndebele", "ZA"),
+    ("nv", "nav", "nav", "Navajo;Navaho", "US"),
+    ("ny", "nya", "nya", "Chichewa;Chewa;Nyanja", "MW"),
+    ("oc", "oci", "oci", "Occitan", "FR"),
+    ("oj", "oji", "oji", "Ojibwa", "CA"),
+    ("om", "orm", "orm", "Oromo", "ET"),
+    ("or", "ori", "ori", "Oriya;Odia", "IN"),
+    ("os", "oss", "oss", "Ossetian;Ossetic", "RU"),
+    ("pa", "pan", "pan", "Punjabi;Panjabi", "IN"),
+    ("pi", "pli", "pli", "Pali", ""),
+    ("pl", "pol", "pol", "Polish", "PL"),
+    ("ps", "pus", "pus", "Pashto;Pushto", "AF"),
+    ("pt", "por", "por", "Portuguese", "PT"),
+    ("qu", "que", "que", "Quechua", "PE"),
+    ("rm", "roh", "roh", "Romansh", "CH"),
+    ("rn", "run", "run", "Rundi;Kirundi", "BI"),
+    ("ro", "rum", "ron", "Romanian;Moldavian;Moldovan", "RO"),
+    ("ru", "rus", "rus", "Russian", "RU"),
+    ("rw", "kin", "kin", "Kinyarwanda", "RW"),
+    ("sa", "san", "san", "Sanskrit", "IN"),
+    ("sc", "srd", "srd", "Sardinian", "IT"),
+    ("sd", "snd", "snd", "Sindhi", "PK"),
+    ("se", "sme", "sme", "Northern Sami", "NO"),
+    ("sg", "sag", "sag", "Sango", "CF"),
+    ("si", "sin", "sin", "Sinhala;Sinhalese", "LK"),
+    ("sk", "slo", "slk", "Slovak", "SK"),
+    ("sl", "slv", "slv", "Slovenian;Slovene", "SI"),
+    ("sm", "smo", "smo", "Samoan", "WS"),
+    ("sn", "sna", "sna", "Shona", "ZW"),
+    ("so", "som", "som", "Somali", "SO"),
+    ("sq", "alb", "sqi", "Albanian", "AL"),
+    ("sr", "srp", "srp", "Serbian", "RS"),
+    ("ss", "ssw", "ssw", "Swati;Swazi", "SZ"),
+    ("st", "sot", "sot", "Southern Sotho;Sesotho", "LS"),
+    ("su", "sun", "sun", "Sundanese", "ID"),
+    ("sv", "swe", "swe", "Swedish", "SE"),
+    ("sw", "swa", "swa", "Swahili", "TZ"),
+    ("ta", "tam", "tam", "Tamil", "IN"),
+    ("te", "tel", "tel", "Telugu", "IN"),
+    ("tg", "tgk", "tgk", "Tajik", "TJ"),
+    ("th", "tha", "tha", "Thai", "TH"),
+    ("ti", "tir", "tir", "Tigrinya", "ER"),
+    ("tk", "tuk", "tuk", "Turkmen", "TM"),
+    ("tl", "tgl", "tgl", "Tagalog", "PH"),
+    ("tn", "tsn", "tsn", "Tswana;Setswana", "BW"),
+    ("to", "ton", "ton", "Tonga;Tongan", "TO"),
+    ("tr", "tur", "tur", "Turkish", "TR"),
+    ("ts", "tso", "tso", "Tsonga", "ZA"),
+    ("tt", "tat", "tat", "Tatar", "RU"),
+    ("tw", "twi", "twi", "Twi", "GH"),
+    ("ty", "tah", "tah", "Tahitian", "PF"),
+    ("ug", "uig", "uig", "Uyghur;Uighur", "CN"),
+    ("uk", "ukr", "ukr", "Ukrainian", "UA"),
+    ("ur", "urd", "urd", "Urdu", "PK"),
+    ("uz", "uzb", "uzb", "Uzbek", "UZ"),
+    ("ve", "ven", "ven", "Venda", "ZA"),
+    ("vi", "vie", "vie", "Vietnamese", "VN"),
+    ("vo", "vol", "vol", "Volapuk;Volapük", ""),
+    ("wa", "wln", "wln", "Walloon", "BE"),
+    ("wo", "wol", "wol", "Wolof", "SN"),
+    ("xh", "xho", "xho", "Xhosa", "ZA"),
+    ("yi", "yid", "yid", "Yiddish", ""),
+    ("yo", "yor", "yor", "Yoruba", "NG"),
+    ("za", "zha", "zha", "Zhuang", "CN"),
+    ("zh", "chi", "zho", "Chinese", "CN"),
+    ("zu", "zul", "zul", "Zulu", "ZA"),
+    # Languages without an ISO 639-1 code that show up in release tracks
+    ("", "ast", "ast", "Asturian", "ES"),
+    ("", "ceb", "ceb", "Cebuano", "PH"),
+    ("", "cmn", "cmn", "Mandarin;Mandarin Chinese", "CN"),
+    ("", "fil", "fil", "Filipino", "PH"),
+    ("", "grc", "grc", "Ancient Greek", "GR"),
+    ("", "haw", "haw", "Hawaiian", "US"),
+    ("", "hmn", "hmn", "Hmong", ""),
+    ("", "mul", "mul", "Multiple languages", ""),
+    ("", "nan", "nan", "Min Nan;Hokkien;Taiwanese", "TW"),
+    ("", "sgn", "sgn", "Sign languages;Sign language", ""),
+    ("", "und", "und", "Undetermined;Unknown", ""),
+    ("", "yue", "yue", "Cantonese;Yue Chinese", "HK"),
+    ("", "zxx", "zxx", "No linguistic content", ""),
+)
+
+# ISO 3166-1 alpha-2 codes, used to tell region subtags from language codes
+REGIONS = frozenset(
+    """
+    AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ BA BB BD BE BF BG BH BI BJ BL
+    BM BN BO BQ BR BS BT BV BW BY BZ CA CC CD CF CG CH CI CK CL CM CN CO CR CU CV
+    CW CX CY CZ DE DJ DK DM DO DZ EC EE EG EH ER ES ET FI FJ FK FM FO FR GA GB GD
+    GE GF GG GH GI GL GM GN GP GQ GR GS GT GU GW GY HK HM HN HR HT HU ID IE IL IM
+    IN IO IQ IR IS IT JE JM JO JP KE KG KH KI KM KN KP KR KW KY KZ LA LB LC LI LK
+    LR LS LT LU LV LY MA MC MD ME MF MG MH MK ML MM MN MO MP MQ MR MS MT MU MV MW
+    MX MY MZ NA NC NE NF NG NI NL NO NP NR NU NZ OM PA PE PF PG PH PK PL PM PN PR
+    PS PT PW PY QA RE RO RS RU RW SA SB SC SD SE SG SH SI SJ SK SL SM SN SO SR SS
+    ST SV SX SY SZ TC TD TF TG TH TJ TK TL TM TN TO TR TT TV TW TZ UA UG UM US UY
+    UZ VA VC VE VG VI VN VU WF WS YE YT ZA ZM ZW
+    """.split()
+)
+
+# Script subtags and variant words that imply a region
+VARIANT_REGIONS = MappingProxyType({
+    "hans": "CN", "simplified": "CN", "mandarin": "CN",
+    "hant": "TW", "traditional": "TW", "taiwan": "TW",
+    "cantonese": "HK", "hong kong": "HK",
+    "419": "MX", "latin america": "MX", "latin american": "MX", "mexico": "MX",
+    "brazil": "BR", "brazilian": "BR",
+    "european": "PT", "portugal": "PT",
+    "castilian": "ES", "spain": "ES",
+    "canada": "CA", "canadian": "CA", "quebec": "CA",
+    "france": "FR", "belgium": "BE", "switzerland": "CH", "swiss": "CH",
+    "austria": "AT", "germany": "DE",
+    "united states": "US", "american": "US", "usa": "US",
+    "united kingdom": "GB", "british": "GB", "uk": "GB",
+    "australia": "AU", "india": "IN",
+})
+
+# Region codes that the original flag table accepted as languages. A bare
+# upper-case "KR" means Korean here, not Kanuri (ISO 639-1 "kr").
+REGION_LANGUAGES = MappingProxyType({
+    "JP": "ja", "US": "en", "GB": "en", "CN": "zh", "KR": "ko",
+})
+
+
+def _build_tables():
+    codes = {}
+    names = {}
+    for iso639_1, iso639_2b, iso639_2t, name_list, region in _LANGUAGE_ROWS:
+        all_names = name_list.split(";")
+        language = Language(iso639_1 or iso639_2t, iso639_2b, iso639_2t, all_names[0], region)
+        for code in (iso639_1, iso639_2b, iso639_2t):
+            if code:
+                codes.setdefault(code, language)
+        for name in all_names:
+            names.setdefault(name.lower(), language)
+    return MappingProxyType(codes), MappingProxyType(names)
+
+
+LANGUAGES_BY_CODE, LANGUAGES_BY_NAME = _build_tables()
+
+LANGUAGE_TAG = re.compile(r"^([a-z]{2,3})(?:[-_][a-z0-9]{2,8})*$")
+
+
+def region_flag(region: str) -> str:
+    """Get the flag emoji of an ISO 3166-1 alpha-2 region code"""
+    if region not in REGIONS:
+        return ""
+    return "".join(chr(0x1F1E6 + ord(letter) - ord("A")) for letter in region)
+
+
+def _subtag_region(subtag: str) -> str:
+    if subtag.upper() in REGIONS:
+        return subtag.upper()
+    return VARIANT_REGIONS.get(subtag, "")
+
+
+def _resolve_tag(value: str) -> Tuple[Optional[Language], str]:
+    """Resolve an ISO 639 code or a BCP 47 tag such as zh-Hant-TW"""
+    if not LANGUAGE_TAG.match(value):
+        return None, ""
+    subtags = re.split(r"[-_]", value)
+    region = ""
+    for subtag in subtags[1:]:
+        region = _subtag_region(subtag) or region
+    return LANGUAGES_BY_CODE.get(subtags[0]), region
+
+
+@lru_cache(maxsize=4096)
+def resolve_language(raw: str) -> Tuple[str, str]:
+    """Resolve a MediaInfo language value into (ISO 639 code, flag)
+
+    The code is the ISO 639-1 code when the language has one, otherwise its
+    ISO 639-2/T code. Either part is empty when it cannot be determined.
+    """
+    value = (raw or "").strip()
+    if value in REGION_LANGUAGES:
+        return REGION_LANGUAGES[value], region_flag(value)
+    value = value.lower()
+    if not value:
+        return "", ""
+
+    language, region, qualifier = None, "", ""
+    if "(" in value and ")" in value:
+        qualifier = value[value.find("(") + 1 : value.find(")")].strip()
+        value = value[: value.find("(")].strip()
+
+    language = LANGUAGES_BY_NAME.get(value)
+    if language is None:
+        language, region = _resolve_tag(value)
+    if language is None and value.upper() in REGIONS:
+        region = value.upper()
+
+    if qualifier:
+        qualifier_region = _subtag_region(qualifier)
+        if qualifier_region:
+            region = qualifier_region
+        elif language is None:
+            language, region = _resolve_tag(qualifier)
+            language = language or LANGUAGES_BY_NAME.get(qualifier)
+
+    if language is None:
+        return "", region_flag(region)
+    return language.code, region_flag(region or language.region)
@@ -11,219 +11,895 @@ the Free Software Foundation, either version 3 of the License, or
 (at your option) any later version.
 """
 
-from typing import Dict, Optional, Union
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import codec
+from languages import resolve_language
 from models import AudioTrack, SubtitleTrack
 
+MAIN_CHANNEL_NAMES = frozenset({
+    "Lscr", "Rscr", "C", "Lc", "Rc", "L", "R", "Lw", "Rw", "Lss", "Rss",
+    "Ls", "Rs", "Lsd", "Rsd", "Lb", "Rb", "Cb", "M",
+})
+HEIGHT_CHANNEL_NAMES = frozenset({
+    "Bfc", "Bfl", "Bfr", "Tfc", "Vhl", "Vhr", "Tfl", "Tfr", "Tsl", "Tsr",
+    "Lvs", "Rvs", "Tbl", "Tbr", "Tbc", "Tc",
+})
+LFE_CHANNEL_NAMES = frozenset({"LFE", "LFE2"})
+
+Setter = Callable[[Dict, str], None]
+
+
+@lru_cache(maxsize=1024)
+def channel_layout_to_channels(layout: str) -> str:
+    """Convert a channel layout such as "L R C LFE Ls Rs" into "5.1" notation"""
+    main_channels = 0
+    lfe_channels = 0
+    height_channels = 0
+    for channel in layout.split():
+        if channel in MAIN_CHANNEL_NAMES:
+            main_channels += 1
+        elif channel in LFE_CHANNEL_NAMES:
+            lfe_channels += 1
+        elif channel in HEIGHT_CHANNEL_NAMES:
+            height_channels += 1
+    if height_channels > 0:
+        return f"{main_channels}.{lfe_channels}.{height_channels}"
+    return f"{main_channels}.{lfe_channels}"
+
+
+def _strip_pixels(value: str) -> str:
+    return value.replace("pixels", "").replace(" ", "").strip()
+
+
+def _set(field: str, transform: Optional[Callable[[str], str]] = None) -> Setter:
+    if transform is None:
+        def setter(target: Dict, value: str) -> None:
+            target[field] = value
+    else:
+        def setter(target: Dict, value: str) -> None:
+            target[field] = transform(value)
+    return setter
+
+
+def _set_if_empty(field: str, transform: Optional[Callable[[str], str]] = None) -> Setter:
+    def setter(target: Dict, value: str) -> None:
+        if not target[field]:
+            target[field] = transform(value) if transform else value
+    return setter
+
+
+def _build_table(fields: Dict[str, Setter]) -> Dict[str, Setter]:
+    """Expand "a|b" aliases so each lowercase key maps straight to its setter"""
+    table = {}
+    for keys, setter in fields.items():
+        for key in keys.split("|"):
+            table[key] = setter
+    return table
+
+
+GENERAL_SETTERS = _build_table({
+    "format": _set("format"),
+    "duration": _set("duration"),
+    "overall bit rate|bit rate": _set("bitrate"),
+    "file size|size": _set("size"),
+    "frame rate": _set("frame_rate"),
+    "complete name": _set("complete_name"),
+    "movie name": _set("movie_name"),
+})
+
+VIDEO_SETTERS = _build_table({
+    "format": _set("format"),
+    "width": _set("width", _strip_pixels),
+    "height": _set("height", _strip_pixels),
+    "display aspect ratio|aspect ratio": _set("aspect_ratio"),
+    "frame rate|frame rate mode": _set("frame_rate"),
+    "bit rate|nominal bit rate": _set("bit_rate"),
+    "bit depth|bit depth (bits)": _set("bit_depth"),
+    "hdr format": _set("hdr_format"),
+    "color primaries": _set("color_primaries"),
+    "transfer characteristics": _set("transfer_characteristics"),
+    "title": _set("title"),
+    "stream size": _set("stream_size"),
+})
+
+AUDIO_SETTERS = _build_table({
+    "language": _set("language"),
+    "format": _set("format"),
+    "channel(s)|channels": _set_if_empty("channels"),
+    "channel layout": _set("channels", channel_layout_to_channels),
+    "bit rate|nominal bit rate": _set("bit_rate"),
+    "format settings": _set("format_settings"),
+    "sampling rate|sampling frequency": _set("sampling_rate"),
+    "commercial name": _set("commercial_name"),
+    "title": _set("title"),
+    "stream size": _set("stream_size"),
+    "default": _set("default"),
+})
+
+TEXT_SETTERS = _build_table({
+    "language": _set("language"),
+    "title": _set("title"),
+    "default": _set("default"),
+    "forced": _set("forced"),
+})
+
+OUTPUT_EXTENSIONS = {"text": "txt", "json": "json", "xml": "xml"}
+MEDIAINFO_XML_NAMESPACE = "https://mediaarea.net/mediainfo"
+ET.register_namespace("", MEDIAINFO_XML_NAMESPACE)
+
+ASPECT_RATIO_NAMES = {"1.250": "5:4", "1.333": "4:3", "1.500": "3:2", "1.778": "16:9"}
+SIZE_UNITS = ("Bytes", "KiB", "MiB", "GiB", "TiB", "PiB")
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _group_thousands(number: int) -> str:
+    return f"{number:,}".replace(",", " ")
+
+
+def format_duration(value: str) -> str:
+    """Format a duration in seconds the way MediaInfo text output does"""
+    seconds = _to_float(value)
+    if seconds is None:
+        return value
+    total_ms = int(round(seconds * 1000))
+    hours, rest = divmod(total_ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    secs, millis = divmod(rest, 1000)
+    if hours:
+        return f"{hours} h {minutes} min"
+    if minutes:
+        return f"{minutes} min {secs} s"
+    if secs:
+        return f"{secs} s {millis} ms"
+    return f"{millis} ms"
+
+
+def format_bit_rate(value: str) -> str:
+    """Format a bit rate given in b/s, e.g. 4 512 kb/s or 55.0 Mb/s"""
+    bps = _to_float(value)
+    if bps is None:
+        return value
+    if bps >= 10_000_000:
+        mbps = bps / 1_000_000
+        return f"{mbps:.0f} Mb/s" if mbps >= 100 else f"{mbps:.1f} Mb/s"
+    return f"{_group_thousands(int(round(bps / 1000)))} kb/s"
+
+
+def format_size(value: str) -> str:
+    """Format a size given in bytes, e.g. 58.3 GiB or 726 MiB"""
+    size = _to_float(value)
+    if size is None:
+        return value
+    unit = 0
+    while size >= 1024 and unit < len(SIZE_UNITS) - 1:
+        size /= 1024
+        unit += 1
+    if unit == 0:
+        return f"{int(size)} {SIZE_UNITS[0]}"
+    if size >= 100:
+        return f"{size:.0f} {SIZE_UNITS[unit]}"
+    if size >= 10:
+        return f"{size:.1f} {SIZE_UNITS[unit]}"
+    return f"{size:.2f} {SIZE_UNITS[unit]}"
+
+
+def format_frame_rate(value: str) -> str:
+    """Format a frame rate, e.g. 23.976 FPS"""
+    fps = _to_float(value)
+    return f"{fps:.3f} FPS" if fps is not None else value
+
+
+def format_aspect_ratio(value: str) -> str:
+    """Format a display aspect ratio, e.g. 1.778 as 16:9"""
+    ratio = _to_float(value)
+    if ratio is None:
+        return value
+    return ASPECT_RATIO_NAMES.get(f"{ratio:.3f}", f"{ratio:.2f}:1")
+
+
+def format_bit_depth(value: str) -> str:
+    """Format a bit depth, e.g. 10 bits"""
+    return f"{value} bits" if value.isdigit() else value
+
+
+def format_sampling_rate(value: str) -> str:
+    """Format a sampling rate given in Hz, e.g. 48.0 kHz"""
+    hertz = _to_float(value)
+    return f"{hertz / 1000:.1f} kHz" if hertz is not None else value
+
+
+def format_channels(value: str) -> str:
+    """Format a channel count, e.g. 6 channels"""
+    if value == "1":
+        return "1 channel"
+    return f"{value} channels" if value.isdigit() else value
+
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(h|min|s|ms)\b")
+CLOCK_DURATION = re.compile(r"^(\d+):(\d{2}):(\d{2})(?:[.:](\d{1,3}))?")
+UNIT_NUMBER = re.compile(r"^(\d[\d ]*(?:\.\d+)?)\s*([A-Za-z]*)")
+FRAME_RATE_RATIO = re.compile(r"\((\d+)/(\d+)\)")
+DURATION_UNITS_MS = {"h": 3_600_000, "min": 60_000, "s": 1000, "ms": 1}
+BIT_RATE_UNITS = {"b/s": 1, "kb/s": 1000, "Kb/s": 1000, "Mb/s": 1_000_000, "Gb/s": 1_000_000_000}
+SIZE_UNIT_BYTES = {
+    "Bytes": 1, "Byte": 1, "B": 1,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4, "PiB": 1024 ** 5,
+    "KB": 1000, "kB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+}
+SAMPLE_RATE_UNITS = {"Hz": 1, "kHz": 1000, "KHz": 1000, "MHz": 1_000_000}
+# Broadcast rates shown rounded by MediaInfo, mapped back to their exact ratios
+NTSC_FRAME_RATES = {
+    "23.976": (24000, 1001), "29.970": (30000, 1001), "47.952": (48000, 1001),
+    "59.940": (60000, 1001), "119.880": (120000, 1001),
+}
+
+
+def _unit_number(value: str, units: Dict[str, int]) -> Optional[int]:
+    """Parse "4 512 kb/s" style values into an integer of the base unit"""
+    value = value.strip()
+    match = UNIT_NUMBER.match(value)
+    if not match:
+        return None
+    rest = value[match.end(1):].strip()
+    unit = rest.split()[0] if rest else ""
+    multiplier = units.get(unit, 1 if not unit else None)
+    if multiplier is None:
+        return None
+    return int(round(float(match.group(1).replace(" ", "")) * multiplier))
+
+
+def parse_duration_ms(value: str) -> Optional[int]:
+    """Parse "1 h 52 min" or "01:52:03.123" into milliseconds"""
+    clock = CLOCK_DURATION.match(value.strip())
+    if clock:
+        hours, minutes, seconds, millis = clock.groups()
+        return (
+            int(hours) * 3_600_000 + int(minutes) * 60_000 + int(seconds) * 1000
+            + int((millis or "0").ljust(3, "0"))
+        )
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return int(round(sum(float(number) * DURATION_UNITS_MS[unit] for number, unit in parts)))
+
+
+def parse_bit_rate_bps(value: str) -> Optional[int]:
+    """Parse "23.4 Mb/s" or "4 512 kb/s" into bits per second"""
+    return _unit_number(value, BIT_RATE_UNITS)
+
+
+def parse_size_bytes(value: str) -> Optional[int]:
+    """Parse "58.3 GiB" or "726 MiB (1%)" into bytes"""
+    return _unit_number(value, SIZE_UNIT_BYTES)
+
+
+def parse_sample_rate_hz(value: str) -> Optional[int]:
+    """Parse "48.0 kHz" into Hz, taking the first rate when several are listed"""
+    return _unit_number(value.split("/")[0], SAMPLE_RATE_UNITS)
+
+
+def parse_pixels(value: str) -> Optional[int]:
+    """Parse "3 840 pixels" or "3840" into an integer"""
+    digits = value.replace("pixels", "").replace(" ", "").strip()
+    return int(digits) if digits.isdigit() else None
+
+
+def parse_frame_rate(value: str) -> Optional[Tuple[int, int]]:
+    """Parse "23.976 (24000/1001) FPS" into an exact (numerator, denominator)"""
+    ratio = FRAME_RATE_RATIO.search(value)
+    if ratio:
+        numerator, denominator = int(ratio.group(1)), int(ratio.group(2))
+        return (numerator, denominator) if denominator else None
+    match = UNIT_NUMBER.match(value.strip())
+    if not match:
+        return None
+    number = match.group(1).replace(" ", "")
+    fps = float(number)
+    exact = NTSC_FRAME_RATES.get(f"{fps:.3f}")
+    if exact:
+        return exact
+    fraction = Fraction(number).limit_denominator(1001)
+    return fraction.numerator, fraction.denominator
+
+
+def _seconds_to_ms(value: str) -> Optional[int]:
+    seconds = _to_float(value)
+    return int(round(seconds * 1000)) if seconds is not None else None
+
+
+def _to_int(value: str) -> Optional[int]:
+    number = _to_float(value)
+    return int(round(number)) if number is not None else None
+
+
+# Numeric field -> (display field, parser) filled in from the display strings
+GENERAL_NUMBERS = {
+    "duration_ms": ("duration", parse_duration_ms),
+    "bitrate_bps": ("bitrate", parse_bit_rate_bps),
+    "size_bytes": ("size", parse_size_bytes),
+}
+VIDEO_NUMBERS = {
+    "width_px": ("width", parse_pixels),
+    "height_px": ("height", parse_pixels),
+    "bit_rate_bps": ("bit_rate", parse_bit_rate_bps),
+    "stream_size_bytes": ("stream_size", parse_size_bytes),
+}
+AUDIO_NUMBERS = {
+    "bit_rate_bps": ("bit_rate", parse_bit_rate_bps),
+    "sample_rate_hz": ("sampling_rate", parse_sample_rate_hz),
+    "stream_size_bytes": ("stream_size", parse_size_bytes),
+}
+
+# Exact numeric values taken straight from JSON/XML tracks
+STRUCTURED_NUMBERS = {
+    "General": {
+        "Duration": ("duration_ms", _seconds_to_ms),
+        "OverallBitRate": ("bitrate_bps", _to_int),
+        "FileSize": ("size_bytes", _to_int),
+        "FrameRate_Num": ("fps_num", _to_int),
+        "FrameRate_Den": ("fps_den", _to_int),
+    },
+    "Video": {
+        "Width": ("width_px", _to_int),
+        "Height": ("height_px", _to_int),
+        "BitRate": ("bit_rate_bps", _to_int),
+        "StreamSize": ("stream_size_bytes", _to_int),
+        "FrameRate_Num": ("fps_num", _to_int),
+        "FrameRate_Den": ("fps_den", _to_int),
+    },
+    "Audio": {
+        "BitRate": ("bit_rate_bps", _to_int),
+        "SamplingRate": ("sample_rate_hz", _to_int),
+        "StreamSize": ("stream_size_bytes", _to_int),
+    },
+}
+
+
+def _add_numbers(target: Dict, numbers: Dict[str, Tuple[str, Callable]]) -> None:
+    for field, (display_field, parse) in numbers.items():
+        if target.get(field) is None and target.get(display_field):
+            target[field] = parse(target[display_field])
+    if target.get("fps_num") is None and target.get("frame_rate"):
+        frame_rate = parse_frame_rate(target["frame_rate"])
+        if frame_rate:
+            target["fps_num"], target["fps_den"] = frame_rate
+
+
+# Keys of `mediainfo --Output=JSON` and `--Output=XML` tracks, which share names
+GENERAL_FIELDS = {
+    "Format": _set("format"),
+    "Duration": _set("duration", format_duration),
+    "OverallBitRate": _set("bitrate", format_bit_rate),
+    "FileSize": _set("size", format_size),
+    "FrameRate": _set("frame_rate", format_frame_rate),
+    "CompleteName": _set("complete_name"),
+    "Movie": _set("movie_name"),
+}
+
+VIDEO_FIELDS = {
+    "Format": _set("format"),
+    "Width": _set("width"),
+    "Height": _set("height"),
+    "DisplayAspectRatio": _set("aspect_ratio", format_aspect_ratio),
+    "FrameRate": _set("frame_rate", format_frame_rate),
+    "BitRate": _set("bit_rate", format_bit_rate),
+    "BitDepth": _set("bit_depth", format_bit_depth),
+    "HDR_Format": _set("hdr_format"),
+    "colour_primaries": _set("color_primaries"),
+    "transfer_characteristics": _set("transfer_characteristics"),
+    "Title": _set("title"),
+    "StreamSize": _set("stream_size", format_size),
+}
+
+AUDIO_FIELDS = {
+    "Language": _set("language"),
+    "Format": _set("format"),
+    "Channels": _set_if_empty("channels", format_channels),
+    "ChannelLayout": _set("channels", channel_layout_to_channels),
+    "BitRate": _set("bit_rate", format_bit_rate),
+    "Format_Settings": _set("format_settings"),
+    "SamplingRate": _set("sampling_rate", format_sampling_rate),
+    "Format_Commercial_IfAny": _set("commercial_name"),
+    "Title": _set("title"),
+    "StreamSize": _set("stream_size", format_size),
+    "Default": _set("default"),
+}
+
+TEXT_FIELDS = {
+    "Language": _set("language"),
+    "Title": _set("title"),
+    "Default": _set("default"),
+    "Forced": _set("forced"),
+}
+
+SECTION_HEADER = re.compile(r"^(General|Video|Audio|Text|Image|Menu|Other|Chapters)(?: #\d+)?$")
+CHAPTER_LINE = re.compile(r"^(\d+:\d{2}:\d{2}[.:]\d{3})\s*:\s?(.*)$")
+CHAPTER_KEY = re.compile(r"^_(\d+)_(\d{2})_(\d{2})_(\d{3})$")
+
+INTERN_MAX_LENGTH = 64
+
+
+def _interner() -> Callable[[str], str]:
+    """Share one string object for keys and short values repeated across tracks
+
+    The pool lives for one parse only, so strings from uploads are never
+    pinned in the process.
+    """
+    pool: Dict[str, str] = {}
+
+    def intern_value(value: str) -> str:
+        if len(value) > INTERN_MAX_LENGTH:
+            return value
+        return pool.setdefault(value, value)
+
+    return intern_value
+
+
+def _full_track(track_type: str, keys: List[str], values: List[str], chapters: List) -> Dict:
+    track = {"type": track_type, "keys": tuple(keys), "values": tuple(values)}
+    if chapters:
+        track["chapters"] = tuple(chapters)
+    return track
+
+
+AUDIO_TRACK_TEMPLATE = AudioTrack().to_dict()
+SUBTITLE_TRACK_TEMPLATE = SubtitleTrack().to_dict()
+
+
 class MediaInfoParser:
     """Class for parsing MediaInfo output into a dictionary"""
-    def __init__(self):
-        self.language_flags = {
-            "JP": "🇯🇵",
-            "JA": "🇯🇵",
-            "EN": "🇺🇸",
-            "US": "🇺🇸",
-            "GB": "🇬🇧",
-            "FR": "🇫🇷",
-            "ES": "🇪🇸",
-            "DE": "🇩🇪",
-            "IT": "🇮🇹",
-            "CN": "🇨🇳",
-            "ZH": "🇨🇳",
-            "KO": "🇰🇷",
-            "KR": "🇰🇷",
-            "RU": "🇷🇺",
-        }
-
-    def get_language_flag(self, lang_code: Optional[str]) -> str:
-        """Get the language flag for a given language code"""
-        if not lang_code:
-            return ""
-
-        code = lang_code.strip().upper()
-        if "(" in code and ")" in code:
-            code = code[code.find("(") + 1 : code.find(")")].strip()
-
-        return self.language_flags.get(code, "")
+    @staticmethod
+    def get_language_flag(lang_code: Optional[str]) -> str:
+        """Get the language flag for a MediaInfo language name, code or tag"""
+        return resolve_language(lang_code or "")[1]
 
     def parse_file(self, file_path: str) -> Dict:
         """Parse the MediaInfo output file into a dictionary"""
         try:
             with open(file_path, "r", encoding="utf-8") as f:
-                content = "\n".join(line.strip() for line in f if line.strip())
+                return self.parse_lines(f)
+        except OSError as e:
+            print(f"Error reading MediaInfo file: {str(e)}")
+            raise
+
+    def parse_text(self, text: str) -> Dict:
+        """Parse MediaInfo output held in memory into a dictionary"""
+        return self.parse_lines(text.splitlines())
+
+    def iter_blocks(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        """Split concatenated MediaInfo output into the lines of each General block"""
+        block = []
+        seen_general = False
+        for line in lines:
+            if line.strip() == "General":
+                if seen_general:
+                    yield block
+                    block = []
+                seen_general = True
+            block.append(line)
+        if block:
+            yield block
+
+    def iter_records(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield one parsed dictionary per General block of a multi-file dump"""
+        for block in self.iter_blocks(lines):
+            yield self.parse_lines(block)
+
+    def iter_text_records(self, text: str) -> Iterator[Tuple[str, Dict]]:
+        """Yield the raw text and parsed dictionary of each General block"""
+        for block in self.iter_blocks(text.splitlines(keepends=True)):
+            yield "".join(block).strip(), self.parse_lines(block)
+
+    @staticmethod
+    def detect_format(text: str) -> str:
+        """Guess whether MediaInfo output is json, xml or plain text"""
+        head = text[:64].lstrip("\ufeff \t\r\n")
+        if head.startswith(("{", "[")):
+            return "json"
+        if head.startswith("<"):
+            return "xml"
+        return "text"
+
+    def parse_auto(
+        self, text: str, output_format: Optional[str] = None, full: bool = False
+    ) -> Dict:
+        """Parse MediaInfo text, JSON or XML output into a dictionary
+
+        With full=True the display sections are derived from parse_full() and
+        returned together with its format and tracks.
+        """
+        output_format = output_format or self.detect_format(text)
+        if full:
+            return self._with_display(self.parse_full(text, output_format))
+        if output_format == "json":
+            return self.parse_json(text)
+        if output_format == "xml":
+            return self.parse_xml(text)
+        return self.parse_text(text)
+
+    def iter_documents(
+        self, text: str, output_format: Optional[str] = None, full: bool = False
+    ) -> Iterator[Tuple[str, Dict]]:
+        """Yield the raw output and parsed dictionary of each file in a dump"""
+        output_format = output_format or self.detect_format(text)
+        if output_format == "json":
+            for media in self._iter_json_media(text):
+                raw = json.dumps({"media": media}, indent=2)
+                if full:
+                    yield raw, self._with_display(
+                        self._full_from_structured("json", self._media_tracks(media),
+                                                   media.get("@ref", ""))
+                    )
+                else:
+                    yield raw, self._info_from_media(media)
+        elif output_format == "xml":
+            for ref, tracks, raw in self._iter_xml_media(text, keep_raw=True):
+                if full:
+                    yield raw, self._with_display(self._full_from_structured("xml", tracks, ref))
+                else:
+                    yield raw, self._info_from_tracks(tracks, ref)
+        else:
+            for block in self.iter_blocks(text.splitlines(keepends=True)):
+                raw = "".join(block).strip()
+                if full:
+                    yield raw, self._with_display(self._full_from_lines(block))
+                else:
+                    yield raw, self.parse_lines(block)
+
+    def parse_full(self, text: str, output_format: Optional[str] = None) -> Dict:
+        """Parse every section and key of MediaInfo output, Menu chapters included
+
+        Returns {"format", "ref", "tracks"} where each track holds its type and
+        ordered, interned key/value tuples, plus (timestamp, title) chapter pairs
+        for Menu tracks.
+        """
+        output_format = output_format or self.detect_format(text)
+        if output_format == "json":
+            medias = (
+                (media.get("@ref", ""), self._media_tracks(media))
+                for media in self._iter_json_media(text)
+            )
+        elif output_format == "xml":
+            medias = ((ref, tracks) for ref, tracks, _ in self._iter_xml_media(text))
+        else:
+            return self._full_from_lines(text.splitlines())
+
+        full = {"format": output_format, "ref": "", "tracks": []}
+        for ref, tracks in medias:
+            media_full = self._full_from_structured(output_format, tracks, ref)
+            full["ref"] = full["ref"] or ref
+            full["tracks"].extend(media_full["tracks"])
+        return full
+
+    def display_info(self, full: Dict) -> Dict:
+        """Derive the general/video/audio/subtitles sections from parse_full() output"""
+        if full.get("format", "text") != "text":
+            return self._info_from_tracks(
+                (
+                    (track["type"], dict(zip(track["keys"], track["values"])))
+                    for track in full.get("tracks", [])
+                ),
+                full.get("ref", ""),
+            )
+
+        info = self._empty_info()
+        for track in full.get("tracks", []):
+            track_type = track["type"]
+            if track_type == "General":
+                setters, target = GENERAL_SETTERS, info["general"]
+            elif track_type == "Video":
+                setters, target = VIDEO_SETTERS, info["video"]
+            elif track_type == "Audio":
+                setters, target = AUDIO_SETTERS, dict(AUDIO_TRACK_TEMPLATE)
+                info["audio"].append(target)
+            elif track_type == "Text":
+                setters, target = TEXT_SETTERS, dict(SUBTITLE_TRACK_TEMPLATE)
+                info["subtitles"].append(target)
+            else:
+                continue
+            for key, value in zip(track["keys"], track["values"]):
+                setter = setters.get(key.lower())
+                if setter is not None:
+                    setter(target, value)
+
+        self._finalize(info)
+        return info
 
-            info = {
-                "general": {},
-                "video": {},
-                "audio": [],
-                "subtitles": []
-            }
+    def _with_display(self, full: Dict) -> Dict:
+        info = self.display_info(full)
+        info.update(full)
+        return info
 
-            current_section = None
+    @staticmethod
+    def _full_from_lines(lines: Iterable[str]) -> Dict:
+        intern_value = _interner()
+        tracks = []
+        track_type = None
+        keys, values, chapters = [], [], []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if ":" not in line:
+                header = SECTION_HEADER.match(line)
+                if header:
+                    if track_type is not None:
+                        tracks.append(_full_track(track_type, keys, values, chapters))
+                    track_type = intern_value(header.group(1))
+                    keys, values, chapters = [], [], []
+                continue
+            if track_type is None:
+                continue
+            if track_type == "Menu":
+                chapter = CHAPTER_LINE.match(line)
+                if chapter:
+                    chapters.append((chapter.group(1), chapter.group(2).strip()))
+                    continue
+            key, value = line.split(":", 1)
+            keys.append(intern_value(key.strip()))
+            values.append(intern_value(value.strip()))
+
+        if track_type is not None:
+            tracks.append(_full_track(track_type, keys, values, chapters))
+        return {"format": "text", "ref": "", "tracks": tracks}
+
+    @staticmethod
+    def _full_from_structured(
+        output_format: str, tracks: Iterable[Tuple[str, Dict]], ref: str
+    ) -> Dict:
+        intern_value = _interner()
+        full_tracks = []
+        for track_type, fields in tracks:
+            keys, values, chapters = [], [], []
+            for key, value in fields.items():
+                if key == "@type":
+                    continue
+                if key == "extra" and isinstance(value, dict):
+                    for extra_key, extra_value in value.items():
+                        chapter = CHAPTER_KEY.match(extra_key)
+                        if track_type == "Menu" and chapter:
+                            hours, minutes, seconds, millis = chapter.groups()
+                            chapters.append(
+                                (f"{hours}:{minutes}:{seconds}.{millis}", str(extra_value))
+                            )
+                        elif isinstance(extra_value, (str, int, float)):
+                            keys.append(intern_value(f"extra.{extra_key}"))
+                            values.append(intern_value(str(extra_value)))
+                elif isinstance(value, (str, int, float)):
+                    keys.append(intern_value(key))
+                    values.append(intern_value(str(value).strip()))
+            full_tracks.append(
+                _full_track(intern_value(track_type), keys, values, chapters)
+            )
+        return {"format": output_format, "ref": ref, "tracks": full_tracks}
+
+    def parse_json(self, text: str) -> Dict:
+        """Parse `mediainfo --Output=JSON` output into a dictionary"""
+        info = self._empty_info()
+        for media in self._iter_json_media(text):
+            self._info_from_media(media, info)
+        return info
+
+    def iter_json_records(self, text: str) -> Iterator[Dict]:
+        """Yield one parsed dictionary per file of `mediainfo --Output=JSON` output"""
+        for media in self._iter_json_media(text):
+            yield self._info_from_media(media)
+
+    def parse_xml(self, source) -> Dict:
+        """Parse `mediainfo --Output=XML` output from a string or file object"""
+        info = self._empty_info()
+        for ref, tracks, _ in self._iter_xml_media(source):
+            self._info_from_tracks(tracks, ref, info)
+        return info
+
+    def iter_xml_records(self, source) -> Iterator[Dict]:
+        """Yield one parsed dictionary per file of `mediainfo --Output=XML` output"""
+        for ref, tracks, _ in self._iter_xml_media(source):
+            yield self._info_from_tracks(tracks, ref)
+
+    @staticmethod
+    def _empty_info() -> Dict:
+        return {"general": {}, "video": {}, "audio": [], "subtitles": []}
+
+    @staticmethod
+    def _iter_json_media(text: str) -> Iterator[Dict]:
+        document = codec.loads(text)
+        documents = document if isinstance(document, list) else [document]
+        for item in documents:
+            media = item.get("media") if isinstance(item, dict) else None
+            if not isinstance(media, dict):
+                raise ValueError("MediaInfo JSON output has no media object")
+            yield media
+
+    @staticmethod
+    def _media_tracks(media: Dict) -> List[Tuple[str, Dict]]:
+        tracks = media.get("track") or []
+        if isinstance(tracks, dict):
+            tracks = [tracks]
+        return [(track.get("@type", ""), track) for track in tracks if isinstance(track, dict)]
+
+    def _info_from_media(self, media: Dict, info: Optional[Dict] = None) -> Dict:
+        return self._info_from_tracks(self._media_tracks(media), media.get("@ref", ""), info)
+
+    @staticmethod
+    def _iter_xml_media(source, keep_raw: bool = False) -> Iterator[Tuple[str, List, str]]:
+        """Stream (ref, tracks, raw) per media element without building a full tree"""
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        ref = ""
+        tracks = []
+        fields = None
+        extra = None
+        depth = 0
+        track_depth = 0
+        try:
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                tag = elem.tag.rsplit("}", 1)[-1]
+                if event == "start":
+                    depth += 1
+                    if tag == "media":
+                        ref = elem.get("ref", "")
+                        tracks = []
+                    elif tag == "track":
+                        fields = {}
+                        track_depth = depth
+                    elif tag == "extra" and fields is not None and depth == track_depth + 1:
+                        extra = {}
+                    continue
+
+                depth -= 1
+                if tag == "track" and fields is not None:
+                    tracks.append((elem.get("type", ""), fields))
+                    fields = None
+                    if not keep_raw:
+                        elem.clear()
+                elif tag == "media":
+                    raw = ET.tostring(elem, encoding="unicode") if keep_raw else ""
+                    yield ref, tracks, raw
+                    elem.clear()
+                elif fields is not None and depth == track_depth:
+                    if tag == "extra":
+                        fields["extra"] = extra
+                        extra = None
+                    else:
+                        fields[tag] = (elem.text or "").strip()
+                elif extra is not None and depth == track_depth + 1:
+                    extra[tag] = (elem.text or "").strip()
+        except ET.ParseError as e:
+            raise ValueError(f"Malformed MediaInfo XML: {str(e)}") from e
+
+    def _info_from_tracks(
+        self, tracks: Iterable[Tuple[str, Dict]], ref: str = "", info: Optional[Dict] = None
+    ) -> Dict:
+        """Map structured (JSON/XML) tracks onto the parse_text() layout"""
+        if info is None:
+            info = self._empty_info()
+        for track_type, fields in tracks:
+            if track_type == "General":
+                table, target = GENERAL_FIELDS, info["general"]
+                if ref and "CompleteName" not in fields:
+                    target["complete_name"] = ref
+            elif track_type == "Video":
+                table, target = VIDEO_FIELDS, info["video"]
+            elif track_type == "Audio":
+                table, target = AUDIO_FIELDS, dict(AUDIO_TRACK_TEMPLATE)
+                info["audio"].append(target)
+            elif track_type == "Text":
+                table, target = TEXT_FIELDS, dict(SUBTITLE_TRACK_TEMPLATE)
+                info["subtitles"].append(target)
+            else:
+                continue
+
+            numbers = STRUCTURED_NUMBERS.get(track_type, {})
+            for key, value in fields.items():
+                if not isinstance(value, (str, int, float)):
+                    continue
+                setter = table.get(key)
+                if setter is not None:
+                    setter(target, str(value).strip())
+                if key in numbers:
+                    field, convert = numbers[key]
+                    target[field] = convert(str(value))
+
+            rate_num, rate_den = fields.get("FrameRate_Num"), fields.get("FrameRate_Den")
+            if track_type == "Video" and rate_num and rate_den:
+                target["frame_rate"] = format_frame_rate(fields["FrameRate"]).replace(
+                    " FPS", f" ({rate_num}/{rate_den}) FPS"
+                )
+
+        self._finalize(info)
+        return info
+
+    def _finalize(self, info: Dict) -> None:
+        """Add language codes and flags and the numeric fields derived from display strings"""
+        if info["general"]:
+            _add_numbers(info["general"], GENERAL_NUMBERS)
+        if info["video"]:
+            _add_numbers(info["video"], VIDEO_NUMBERS)
+
+        for track in info["audio"]:
+            if track.get("language"):
+                track["language_code"], track["flag"] = resolve_language(track["language"])
+            _add_numbers(track, AUDIO_NUMBERS)
+
+        for track in info["subtitles"]:
+            if track.get("language"):
+                track["language_code"], track["flag"] = resolve_language(track["language"])
+
+    def parse_lines(self, lines: Iterable[str]) -> Dict:
+        """Parse MediaInfo output lines into a dictionary in a single pass"""
+        try:
+            info = self._empty_info()
+
+            setters = None
+            target = None
             current_track = None
             current_track_type = None
 
-            for line in content.split("\n"):
+            for line in lines:
                 line = line.strip()
                 if not line:
                     continue
                 if line == "General":
-                    current_section = "general"
+                    setters, target = GENERAL_SETTERS, info["general"]
                     current_track = None
                     current_track_type = None
                     continue
                 if line.startswith("Video"):
-                    current_section = "video"
+                    setters, target = VIDEO_SETTERS, info["video"]
                     current_track = None
                     current_track_type = None
                     continue
                 if line.startswith("Audio"):
-                    if current_track and current_track_type == "audio":
-                        info["audio"].append(current_track.__dict__)
-                    current_section = "audio"
-                    current_track = AudioTrack()
+                    if current_track_type == "audio":
+                        info["audio"].append(current_track)
+                    current_track = dict(AUDIO_TRACK_TEMPLATE)
                     current_track_type = "audio"
+                    setters, target = AUDIO_SETTERS, current_track
                     continue
                 if line.startswith("Text"):
-                    if current_track and current_track_type == "audio":
-                        info["audio"].append(current_track.__dict__)
-                    if current_track and current_track_type == "text":
-                        info["subtitles"].append(current_track.__dict__)
-                    current_section = "text"
-                    current_track = SubtitleTrack()
+                    if current_track_type == "audio":
+                        info["audio"].append(current_track)
+                    elif current_track_type == "text":
+                        info["subtitles"].append(current_track)
+                    current_track = dict(SUBTITLE_TRACK_TEMPLATE)
                     current_track_type = "text"
+                    setters, target = TEXT_SETTERS, current_track
                     continue
                 if line == "Menu":
-                    if current_track and current_track_type == "text":
-                        info["subtitles"].append(current_track.__dict__)
-                    current_section = "menu"
+                    if current_track_type == "text":
+                        info["subtitles"].append(current_track)
+                    setters, target = None, None
                     current_track = None
                     current_track_type = None
                     continue
 
-                if ":" in line:
-                    key, value = map(str.strip, line.split(":", 1))
-                    self._parse_key_value(
-                        key, value, current_section, info, current_track
-                    )
-
-            if current_track and current_track_type == "audio":
-                info["audio"].append(current_track.__dict__)
-
-            if current_track and current_track_type == "text":
-                info["subtitles"].append(current_track.__dict__)
+                if setters is not None and ":" in line:
+                    key, value = line.split(":", 1)
+                    setter = setters.get(key.strip().lower())
+                    if setter is not None:
+                        setter(target, value.strip())
 
-            for track in info["audio"]:
-                if track.get("language"):
-                    track["flag"] = self.get_language_flag(track["language"])
-
-            for track in info["subtitles"]:
-                if track.get("language"):
-                    track["flag"] = self.get_language_flag(track["language"])
+            if current_track_type == "audio":
+                info["audio"].append(current_track)
+            elif current_track_type == "text":
+                info["subtitles"].append(current_track)
 
+            self._finalize(info)
             return info
 
         except Exception as e:
             print(f"Error parsing MediaInfo: {str(e)}")
             raise
-
-    def _parse_key_value(
-        self,
-        key: str,
-        value: str,
-        section: str,
-        info: Dict,
-        current_track: Union[AudioTrack, SubtitleTrack, None],
-    ) -> None:
-        key = key.lower()
-
-        if section == "general":
-            if key == "format":
-                info["general"]["format"] = value
-            elif key == "duration":
-                info["general"]["duration"] = value
-            elif key in ["overall bit rate", "bit rate"]:
-                info["general"]["bitrate"] = value
-            elif key in ["file size", "size"]:
-                info["general"]["size"] = value
-            elif key == "frame rate":
-                info["general"]["frame_rate"] = value
-            elif key == "complete name":
-                info["general"]["complete_name"] = value
-            elif key == "movie name":
-                info["general"]["movie_name"] = value
-
-        elif section == "video":
-            if key == "format":
-                info["video"]["format"] = value
-            elif key == "width":
-                info["video"]["width"] = value.replace("pixels", "").replace(" ", "").strip()
-            elif key == "height":
-                info["video"]["height"] = value.replace("pixels", "").replace(" ", "").strip()
-            elif key in ["display aspect ratio", "aspect ratio"]:
-                info["video"]["aspect_ratio"] = value
-            elif key in ["frame rate", "frame rate mode"]:
-                info["video"]["frame_rate"] = value
-            elif key in ["bit rate", "nominal bit rate"]:
-                info["video"]["bit_rate"] = value
-            elif key in ["bit depth", "bit depth (bits)"]:
-                info["video"]["bit_depth"] = value
-            elif key == "hdr format":
-                info["video"]["hdr_format"] = value
-            elif key == "color primaries":
-                info["video"]["color_primaries"] = value
-            elif key == "transfer characteristics":
-                info["video"]["transfer_characteristics"] = value
-            elif key == "title":
-                info["video"]["title"] = value
-            elif key == "stream size":
-                info["video"]["stream_size"] = value
-
-        elif section == "audio" and current_track:
-            if key == "language":
-                current_track.language = value
-            elif key == "format":
-                current_track.format = value
-            elif key in ["channel(s)", "channels"] and not current_track.channels:
-                current_track.channels = value
-            elif key == "channel layout":
-                main_channel_names = ["Lscr", "Rscr", "C", "Lc", "Rc", "L", "R", "Lw", "Rw", "Lss", "Rss", "Ls", "Rs", "Lsd", "Rsd", "Lb", "Rb", "Cb", "M"]
-                height_channel_names = ["Bfc", "Bfl", "Bfr", "Tfc", "Vhl", "Vhr", "Tfl", "Tfr", "Tsl", "Tsr", "Lvs", "Rvs", "Tbl", "Tbr", "Tbc", "Tc"]
-                lfe_channel_names = ["LFE", "LFE2"]
-                main_channels = 0
-                lfe_channels = 0
-                height_channels = 0
-                channels = value.split()
-                for channel in channels:
-                    if channel in main_channel_names:
-                        main_channels += 1
-                        continue
-                    if channel in lfe_channel_names:
-                        lfe_channels += 1
-                        continue
-                    if channel in height_channel_names:
-                        height_channels += 1
-                current_track.channels = f"{main_channels}.{lfe_channels}{f'.{height_channels}' if height_channels > 0 else ''}"
-            elif key in ["bit rate", "nominal bit rate"]:
-                current_track.bit_rate = value
-            elif key == "format settings":
-                current_track.format_settings = value
-            elif key in ["sampling rate", "sampling frequency"]:
-                current_track.sampling_rate = value
-            elif key == "commercial name":
-                current_track.commercial_name = value
-            elif key == "title":
-                current_track.title = value
-            elif key == "stream size":
-                current_track.stream_size = value
-            elif key == "default":
-                current_track.default = value
-
-        elif section == "text" and current_track:
-            if key == "language":
-                current_track.language = value
-            elif key == "title":
-                current_track.title = value
-            elif key == "default":
-                current_track.default = value
-            elif key == "forced":
-                current_track.forced = value
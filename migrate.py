@@ -0,0 +1,117 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+One-off data migrations for an existing database.
+
+Usage:
+    python migrate.py parsed-info [--to binary|json] [--batch-size N] [--vacuum]
+    python migrate.py uploads [--limit N]
+    python migrate.py languages [--batch-size N]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import List, Optional
+from dotenv import load_dotenv
+from database import Database
+
+load_dotenv()
+
+
+def migrate_parsed_info(db: Database, args: argparse.Namespace) -> int:
+    """Convert every stored parsed_info value to the requested encoding"""
+    started = time.monotonic()
+    converted = db.migrate_parsed_info(args.to, args.batch_size)
+    print(f"Converted {converted} rows to {args.to} in {time.monotonic() - started:.1f}s")
+    if args.vacuum:
+        before = os.path.getsize(db.db_path)
+        conn = sqlite3.connect(db.db_path)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        after = os.path.getsize(db.db_path)
+        print(f"Database file: {before / 1_000_000:.1f} MB -> {after / 1_000_000:.1f} MB")
+    return 0
+
+
+def migrate_uploads(db: Database, args: argparse.Namespace) -> int:
+    """Move upload files from the root of UPLOAD_FOLDER into their shards
+
+    Safe to run while the application is serving: files are moved with an
+    atomic rename and are looked up in both places until they are moved.
+    """
+    started = time.monotonic()
+    moved = failed = 0
+    for entry in db.uploads.scan_legacy():
+        if args.limit and moved >= args.limit:
+            break
+        try:
+            db.uploads.adopt(entry.name)
+            moved += 1
+        except FileNotFoundError:
+            continue  # deleted in the meantime
+        except OSError as e:
+            print(f"Error moving file {entry.path}: {str(e)}")
+            failed += 1
+    print(f"Moved {moved} files into shard directories in {time.monotonic() - started:.1f}s"
+          + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+def migrate_languages(db: Database, args: argparse.Namespace) -> int:
+    """Rebuild the language search index of every entry"""
+    started = time.monotonic()
+    indexed = db.index_languages(args.batch_size)
+    print(f"Indexed the languages of {indexed} entries in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Migrate MediaInfo-Share data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parsed_info = commands.add_parser(
+        "parsed-info", help="Re-encode stored parsed_info (compact binary or JSON)"
+    )
+    parsed_info.add_argument("--to", choices=("binary", "json"),
+                             default=os.getenv("PARSED_INFO_ENCODING", "binary").lower())
+    parsed_info.add_argument("--batch-size", type=int, default=500,
+                             help="Rows per transaction")
+    parsed_info.add_argument("--vacuum", action="store_true",
+                             help="VACUUM afterwards to return freed pages to the OS")
+    parsed_info.set_defaults(handler=migrate_parsed_info)
+
+    uploads = commands.add_parser(
+        "uploads", help="Move flat UPLOAD_FOLDER files into the sharded layout"
+    )
+    uploads.add_argument("--limit", type=int, default=0,
+                         help="Stop after moving this many files (0 = all)")
+    uploads.set_defaults(handler=migrate_uploads)
+
+    languages = commands.add_parser(
+        "languages", help="Index the audio and subtitle languages of stored entries"
+    )
+    languages.add_argument("--batch-size", type=int, default=500,
+                           help="Entries per transaction")
+    languages.set_defaults(handler=migrate_languages)
+
+    args = parser.parse_args(argv)
+    return args.handler(Database(os.getenv("DB_PATH", "mediainfo.db")), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
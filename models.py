@@ -11,21 +11,39 @@ the Free Software Foundation, either version 3 of the License, or
 (at your option) any later version.
 """
 
+import threading
 from datetime import datetime
-import json
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypedDict
+import codec
+import compact
 
 
-@dataclass
-class MediaResolution:
+class MappingModel:
+    """Conversion between the slotted models and plain dictionaries"""
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        """Convert the model to a dictionary of its fields"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Create the model from a dictionary, ignoring keys it does not know"""
+        if isinstance(data, cls):
+            return data
+        return cls(**{key: value for key, value in data.items() if key in cls.__slots__})
+
+
+@dataclass(frozen=True, slots=True)
+class MediaResolution(MappingModel):
     """Class for storing media width and height"""
     width: str = ""
     height: str = ""
 
 
-@dataclass
-class MediaGeneral:
+@dataclass(frozen=True, slots=True)
+class MediaGeneral(MappingModel):
     """Class for storing media general information"""
     format: str = ""
     duration: str = ""
@@ -34,10 +52,15 @@ class MediaGeneral:
     frame_rate: str = ""
     complete_name: str = ""
     movie_name: str = ""
+    duration_ms: Optional[int] = None
+    bitrate_bps: Optional[int] = None
+    size_bytes: Optional[int] = None
+    fps_num: Optional[int] = None
+    fps_den: Optional[int] = None
 
 
-@dataclass
-class MediaVideo:
+@dataclass(frozen=True, slots=True)
+class MediaVideo(MappingModel):
     """Class for the video section of mediainfo"""
     format: str = ""
     width: str = ""
@@ -51,10 +74,16 @@ class MediaVideo:
     transfer_characteristics: str = ""
     title: str = ""
     stream_size: str = ""
+    width_px: Optional[int] = None
+    height_px: Optional[int] = None
+    bit_rate_bps: Optional[int] = None
+    stream_size_bytes: Optional[int] = None
+    fps_num: Optional[int] = None
+    fps_den: Optional[int] = None
 
 
-@dataclass
-class AudioTrack:
+@dataclass(frozen=True, slots=True)
+class AudioTrack(MappingModel):
     """Class for storing audio track information"""
     language: str = ""
     format: str = ""
@@ -67,19 +96,74 @@ class AudioTrack:
     flag: str = ""
     stream_size: str = ""
     default: str = ""
+    language_code: str = ""
+    bit_rate_bps: Optional[int] = None
+    sample_rate_hz: Optional[int] = None
+    stream_size_bytes: Optional[int] = None
 
 
-@dataclass
-class SubtitleTrack:
+@dataclass(frozen=True, slots=True)
+class SubtitleTrack(MappingModel):
     """Class for storing subtitle track information"""
     language: str = ""
     flag: str = ""
     title: str = ""
     default: str = ""
     forced: str = ""
+    language_code: str = ""
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class MediaTrack:
+    """Class for storing every key of a MediaInfo section in output order"""
+    type: str = ""
+    keys: Tuple[str, ...] = ()
+    values: Tuple[str, ...] = ()
+    chapters: Tuple[Tuple[str, str], ...] = ()
+
+    def get(self, key: str, default: str = "") -> str:
+        """Get the value of a key as it appeared in the MediaInfo output"""
+        try:
+            return self.values[self.keys.index(key)]
+        except ValueError:
+            return default
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over the (key, value) pairs in output order"""
+        return zip(self.keys, self.values)
+
+    def to_dict(self) -> Dict:
+        """Convert the track back to its parse_full() dictionary"""
+        track = {"type": self.type, "keys": self.keys, "values": self.values}
+        if self.chapters:
+            track["chapters"] = self.chapters
+        return track
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MediaTrack":
+        """Create a MediaTrack from a parse_full() track dictionary"""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            type=data.get("type", ""),
+            keys=tuple(data.get("keys", ())),
+            values=tuple(data.get("values", ())),
+            chapters=tuple(tuple(chapter) for chapter in data.get("chapters", ())),
+        )
+
+
+class ParsedInfo(TypedDict, total=False):
+    """Schema of a stored parsed_info document, used for typed decoding"""
+    general: MediaGeneral
+    video: MediaVideo
+    audio: Tuple[AudioTrack, ...]
+    subtitles: Tuple[SubtitleTrack, ...]
+    format: str
+    ref: str
+    tracks: Tuple[MediaTrack, ...]
+
+
+@dataclass(slots=True)
 class MediaInfo:
     """Class for storing mediainfo data"""
     media_id: str
@@ -88,11 +172,18 @@ class MediaInfo:
     uploaded_on: datetime
     expiration: Optional[datetime] = None
     password: Optional[str] = None
-    raw_output: str = ""
-    general: MediaGeneral = field(default_factory=MediaGeneral)
-    video: MediaVideo = field(default_factory=MediaVideo)
-    audio: List[AudioTrack] = field(default_factory=list)
-    subtitles: List[SubtitleTrack] = field(default_factory=list)
+    collection_id: Optional[str] = None
+    # parsed_info as stored (compact bytes or JSON), kept for a shared cache
+    stored_parsed_info: Optional[Any] = field(default=None, repr=False, compare=False)
+    _raw_output: Optional[str] = field(default=None, repr=False, compare=False)
+    _parsed_info: Dict = field(default_factory=dict, repr=False, compare=False)
+    _loader: Optional[Callable[[str, str], Optional[str]]] = field(
+        default=None, repr=False, compare=False
+    )
+    _deferred: Set[str] = field(default_factory=set, repr=False, compare=False)
+    _display: Optional[tuple] = field(default=None, repr=False, compare=False)
+    _tracks: Optional[Tuple[MediaTrack, ...]] = field(default=None, repr=False, compare=False)
+    _lock: Any = field(default=None, repr=False, compare=False)
 
     def __init__(
         self,
@@ -104,7 +195,13 @@ class MediaInfo:
         password: Optional[str] = None,
         raw_output: Optional[str] = None,
         parsed_info: Optional[Dict] = None,
+        collection_id: Optional[str] = None,
     ):
+        # Cached entries are shared between request threads, so the lazy
+        # loads and model builds below run once, under this lock
+        self._lock = threading.RLock()
+        self._loader = None
+        self._deferred = set()
         self.media_id = media_id
         self.filename = filename
         self.original_filename = original_filename
@@ -112,24 +209,155 @@ class MediaInfo:
         self.expiration = expiration
         self.password = password
         self.raw_output = raw_output
-        self.general = MediaGeneral()
-        self.video = MediaVideo()
-        self.audio: List[AudioTrack] = []
-        self.subtitles: List[SubtitleTrack] = []
+        self.collection_id = collection_id
+        self.stored_parsed_info = None
+        self._parsed_info = {}
+        self._display = None
+        self._tracks = None
 
         if parsed_info:
             self._parse_info(parsed_info)
 
+    @classmethod
+    def deferred(
+        cls, data: Dict, loader: Callable[[str, str], Optional[str]]
+    ) -> "MediaInfo":
+        """Create a MediaInfo from a row without its heavy columns
+
+        raw_output and parsed_info are read with loader(media_id, column)
+        the first time they are needed, so password prompts and expired
+        links never fetch or decode them.
+        """
+        media = cls.from_dict(data)
+        media._loader = loader
+        media._deferred = {"raw_output", "parsed_info"} - data.keys()
+        return media
+
+    def _ensure_parsed(self) -> None:
+        if "parsed_info" in self._deferred:
+            with self._lock:
+                if "parsed_info" in self._deferred:
+                    parsed = self._loader(self.media_id, "parsed_info")
+                    self._parse_info(self._decode_parsed_info(parsed))
+
+    @property
+    def raw_output(self) -> Optional[str]:
+        """Raw MediaInfo text, read from the database on first access when deferred"""
+        if "raw_output" in self._deferred:
+            with self._lock:
+                if "raw_output" in self._deferred:
+                    self._raw_output = self._loader(self.media_id, "raw_output")
+                    self._deferred.discard("raw_output")
+        return self._raw_output
+
+    @raw_output.setter
+    def raw_output(self, value: Optional[str]) -> None:
+        self._deferred.discard("raw_output")
+        self._raw_output = value
+
     def _parse_info(self, parsed_info: Dict) -> None:
-        """Parse the parsed_info dictionary into the appropriate fields."""
-        if "general" in parsed_info:
-            self.general = MediaGeneral(**parsed_info["general"])
-        if "video" in parsed_info:
-            self.video = MediaVideo(**parsed_info["video"])
-        if "audio" in parsed_info:
-            self.audio = [AudioTrack(**track) for track in parsed_info["audio"]]
-        if "subtitles" in parsed_info:
-            self.subtitles = [SubtitleTrack(**track) for track in parsed_info["subtitles"]]
+        """Keep the parsed_info dictionary; models are built on first access."""
+        self._parsed_info = parsed_info
+        self._display = None
+        self._tracks = None
+        self._deferred.discard("parsed_info")
+
+    def _full_info(self) -> Dict:
+        return {
+            "format": self._parsed_info.get("format", "text"),
+            "ref": self._parsed_info.get("ref", ""),
+            "tracks": [track.to_dict() for track in self.tracks],
+        }
+
+    def _display_models(self) -> tuple:
+        if self._display is not None:
+            return self._display
+        with self._lock:
+            if self._display is not None:
+                return self._display
+            self._ensure_parsed()
+            parsed_info = self._parsed_info
+            self._display = (
+                MediaGeneral.from_dict(parsed_info.get("general", {})),
+                MediaVideo.from_dict(parsed_info.get("video", {})),
+                tuple(AudioTrack.from_dict(track) for track in parsed_info.get("audio", [])),
+                tuple(SubtitleTrack.from_dict(track) for track in parsed_info.get("subtitles", [])),
+            )
+            # The models replace the section dictionaries from here on
+            self._parsed_info = {
+                key: value for key, value in self._parsed_info.items()
+                if key in ("format", "ref", "tracks")
+            }
+            return self._display
+
+    @property
+    def general(self) -> MediaGeneral:
+        """General section, derived from parsed_info on first access"""
+        return self._display_models()[0]
+
+    @property
+    def video(self) -> MediaVideo:
+        """Video section, derived from parsed_info on first access"""
+        return self._display_models()[1]
+
+    @property
+    def audio(self) -> Tuple[AudioTrack, ...]:
+        """Audio tracks, derived from parsed_info on first access"""
+        return self._display_models()[2]
+
+    @property
+    def subtitles(self) -> Tuple[SubtitleTrack, ...]:
+        """Subtitle tracks, derived from parsed_info on first access"""
+        return self._display_models()[3]
+
+    @property
+    def tracks(self) -> Tuple[MediaTrack, ...]:
+        """Every section of a full-fidelity parse, empty for older uploads"""
+        if self._tracks is not None:
+            return self._tracks
+        with self._lock:
+            if self._tracks is None:
+                self._ensure_parsed()
+                tracks = tuple(
+                    MediaTrack.from_dict(track) for track in self._parsed_info.get("tracks", [])
+                )
+                if "tracks" in self._parsed_info:
+                    self._parsed_info = {
+                        key: value for key, value in self._parsed_info.items() if key != "tracks"
+                    }
+                self._tracks = tracks
+            return self._tracks
+
+    @property
+    def chapters(self) -> List[Tuple[str, str]]:
+        """(timestamp, title) pairs of every Menu section"""
+        return [chapter for track in self.tracks for chapter in track.chapters]
+
+    def to_parsed_info(self) -> Dict:
+        """Build the parsed_info dictionary stored alongside the raw output"""
+        parsed_info = {
+            "general": self.general.to_dict(),
+            "video": self.video.to_dict(),
+            "audio": [track.to_dict() for track in self.audio],
+            "subtitles": [sub.to_dict() for sub in self.subtitles],
+        }
+        if self.tracks:
+            parsed_info.update(self._full_info())
+        return parsed_info
+
+    def parsed_info_document(self) -> Dict:
+        """parsed_info with the models in place of dictionaries, for codec.dumps"""
+        document = {
+            "general": self.general,
+            "video": self.video,
+            "audio": self.audio,
+            "subtitles": self.subtitles,
+        }
+        if self.tracks:
+            document["format"] = self._parsed_info.get("format", "text")
+            document["ref"] = self._parsed_info.get("ref", "")
+            document["tracks"] = self.tracks
+        return document
 
     @classmethod
     def from_dict(cls, data: Dict) -> "MediaInfo":
@@ -144,20 +372,32 @@ class MediaInfo:
             if data.get("expiration") else None
         media.password = data.get("password")
         media.raw_output = data.get("raw_output")
+        media.collection_id = data.get("collection_id")
 
-        parsed = data.get("parsed") or data.get("parsed_info")
+        parsed = media._decode_parsed_info(
+            data.get("parsed_blob") or data.get("parsed") or data.get("parsed_info")
+        )
         if parsed:
-            if isinstance(parsed, str):
-                try:
-                    parsed = json.loads(parsed)
-                except json.JSONDecodeError:
-                    parsed = {}
-
-            if isinstance(parsed, dict):
-                media._parse_info(parsed)
+            media._parse_info(parsed)
 
         return media
 
+    @staticmethod
+    def _decode_parsed_info(parsed) -> Dict:
+        """Decode a stored parsed_info value into a dictionary"""
+        if compact.is_compact(parsed):
+            try:
+                parsed = compact.decode(parsed)
+            except ValueError as e:
+                print(f"Error decoding compact parsed_info: {str(e)}")
+                parsed = {}
+        elif isinstance(parsed, (str, bytes)):
+            try:
+                parsed = codec.loads(parsed, ParsedInfo)
+            except ValueError:
+                parsed = {}
+        return parsed if isinstance(parsed, dict) else {}
+
     def to_dict(self) -> Dict:
         """Convert the MediaInfo object to a dictionary"""
         return {
@@ -168,12 +408,6 @@ class MediaInfo:
             "expiration": self.expiration.isoformat() if self.expiration else None,
             "password": self.password,
             "raw_output": self.raw_output,
-            "parsed_info": {
-                "general": self.general.__dict__,
-                "video": {
-                    **self.video.__dict__,
-                },
-                "audio": [track.__dict__ for track in self.audio],
-                "subtitles": [sub.__dict__ for sub in self.subtitles]
-            }
+            "collection_id": self.collection_id,
+            "parsed_info": self.to_parsed_info(),
         }
@@ -0,0 +1,175 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Reconcile UPLOAD_FOLDER with the media_info table.
+
+Usage:
+    python reconcile.py [--partitions 16] [--rows 20000] [--grace 3600] [--dry-run]
+
+Each run continues where the previous one stopped. Upload files are
+swept a few of the 256 first-level shard directories at a time, and
+files that no entry refers to are deleted once older than --grace
+seconds. Entries are swept by rowid, and the ones whose file is gone
+are flagged with missing_file = 1.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from database import Database
+from storage import PARTITIONS
+
+load_dotenv()
+
+FILES_CURSOR = "reconcile.files"
+ROWS_CURSOR = "reconcile.rows"
+
+
+class Reconciler:
+    """Incremental, resumable sweep for orphaned files and missing files"""
+
+    def __init__(
+        self,
+        db: Database,
+        grace: float = 3600.0,
+        batch_size: int = 500,
+        dry_run: bool = False,
+    ):
+        self.db = db
+        self.uploads = db.uploads
+        self.grace = grace
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = {
+            "files_scanned": 0,
+            "orphans_removed": 0,
+            "bytes_reclaimed": 0,
+            "rows_scanned": 0,
+            "rows_flagged": 0,
+            "rows_restored": 0,
+        }
+
+    def _scan(self, first: int, count: int) -> Dict[str, os.DirEntry]:
+        """Collect the upload files of partitions [first, first + count)"""
+        entries = {}
+        for partition in range(first, first + count):
+            for entry in self.uploads.scan(partition):
+                entries[entry.name] = entry
+        # Files not moved into their shard by `migrate.py uploads` yet
+        for entry in self.uploads.scan_legacy():
+            if first <= self.uploads.partition(entry.name) < first + count:
+                entries[entry.name] = entry
+        return entries
+
+    def _remove_orphans(self, entries: Dict[str, os.DirEntry]) -> None:
+        names = list(entries)
+        cutoff = time.time() - self.grace
+        for start in range(0, len(names), self.batch_size):
+            batch = names[start:start + self.batch_size]
+            known = self.db.get_known_filenames(batch)
+            for name in batch:
+                if name in known:
+                    continue
+                entry = entries[name]
+                try:
+                    stat = entry.stat()
+                    # Uploads are written before their row is committed
+                    if stat.st_mtime > cutoff:
+                        continue
+                    if not self.dry_run:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"Error deleting file {entry.path}: {str(e)}")
+                    continue
+                self.stats["orphans_removed"] += 1
+                self.stats["bytes_reclaimed"] += stat.st_size
+
+    def sweep_files(self, partitions: int) -> None:
+        """Check the next partitions of upload files for orphans"""
+        position = int(self.db.get_job_state(FILES_CURSOR) or 0)
+        remaining = min(partitions, PARTITIONS)
+        while remaining > 0:
+            count = min(remaining, PARTITIONS - position)
+            entries = self._scan(position, count)
+            self.stats["files_scanned"] += len(entries)
+            self._remove_orphans(entries)
+            position = (position + count) % PARTITIONS
+            remaining -= count
+            if not self.dry_run:
+                self.db.set_job_state(FILES_CURSOR, str(position))
+
+    def sweep_rows(self, rows: int) -> None:
+        """Flag the next entries whose upload file is missing"""
+        last_rowid = int(self.db.get_job_state(ROWS_CURSOR) or 0)
+        while rows > 0:
+            batch = self.db.get_file_rows(last_rowid, min(rows, self.batch_size))
+            if not batch:
+                last_rowid = 0
+                break
+            flags = []
+            for row in batch:
+                missing = self.uploads.locate(row["filename"]) is None
+                if missing != bool(row["missing_file"]):
+                    flags.append((int(missing), row["rowid"]))
+                    self.stats["rows_flagged" if missing else "rows_restored"] += 1
+            if not self.dry_run:
+                self.db.set_missing_files(flags)
+            self.stats["rows_scanned"] += len(batch)
+            last_rowid = batch[-1]["rowid"]
+            rows -= len(batch)
+        if not self.dry_run:
+            self.db.set_job_state(ROWS_CURSOR, str(last_rowid))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Reconcile UPLOAD_FOLDER with the database")
+    parser.add_argument("--partitions", type=int, default=16,
+                        help=f"File partitions to sweep this run (of {PARTITIONS})")
+    parser.add_argument("--rows", type=int, default=20000, help="Entries to check this run")
+    parser.add_argument("--grace", type=float, default=3600.0,
+                        help="Only delete orphaned files older than this many seconds")
+    parser.add_argument("--batch-size", type=int, default=500, help="IDs per database query")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report without deleting, flagging or saving progress")
+    args = parser.parse_args(argv)
+
+    db = Database(os.getenv("DB_PATH", "mediainfo.db"))
+    reconciler = Reconciler(db, args.grace, args.batch_size, args.dry_run)
+    started = time.monotonic()
+    try:
+        reconciler.sweep_files(args.partitions)
+        reconciler.sweep_rows(args.rows)
+    except sqlite3.Error as e:
+        print(f"Database error during reconciliation: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+    stats = reconciler.stats
+    print(f"Scanned {stats['files_scanned']} files and {stats['rows_scanned']} entries "
+          f"in {time.monotonic() - started:.1f}s")
+    print(f"{'Would remove' if args.dry_run else 'Removed'} {stats['orphans_removed']} "
+          f"orphaned files, reclaiming {stats['bytes_reclaimed'] / 1_000_000:.1f} MB")
+    print(f"Flagged {stats['rows_flagged']} entries with a missing file, "
+          f"cleared {stats['rows_restored']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Background deletion of expired media entries.
+"""
+
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+from database import Database
+
+# Shortest pause between two cleanup passes
+MIN_INTERVAL = 1.0
+LEASE_NAME = "expiry-cleanup"
+
+
+class ExpiryScheduler:
+    """Run expiry cleanup when the earliest pending expiration is due.
+
+    After each pass the scheduler sleeps until the next expiration in the
+    database, plus a random jitter of up to jitter seconds so that
+    entries expiring close together are removed in one pass, and never
+    longer than max_sleep. notify() brings the wakeup forward when an
+    entry is saved with an earlier expiration.
+
+    Every worker process runs a scheduler, but only the holder of the
+    cleanup lease in the database deletes anything. The leader renews the
+    lease every lease_ttl / 3 seconds, which is also when it sees
+    expirations saved by other processes. The others try to take the
+    lease over every lease_ttl / 2 seconds, so a new leader is elected
+    within lease_ttl seconds of the last one dying.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        max_sleep: float = 3600.0,
+        jitter: float = 5.0,
+        lease_ttl: float = 30.0,
+    ):
+        self.db = db
+        self.max_sleep = max_sleep
+        self.jitter = jitter
+        self.lease_ttl = lease_ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        self._condition = threading.Condition()
+        self._due = 0.0
+        self._renew_at = 0.0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="expiry-scheduler", daemon=True)
+
+    def start(self) -> None:
+        """Start the scheduler thread"""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread and hand the lease over"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self.leader:
+            self.db.release_lease(LEASE_NAME, self.holder)
+            self.leader = False
+
+    def notify(self, expiration: Optional[datetime]) -> None:
+        """Wake up in time for a newly saved expiration"""
+        if expiration is None:
+            return
+        due = expiration.timestamp() + random.uniform(0, self.jitter)
+        with self._condition:
+            if due < self._due:
+                self._due = due
+                self._condition.notify()
+
+    def _plan(self) -> None:
+        now = time.time()
+        expiration = self.db.next_expiration()
+        due = now + self.max_sleep
+        if expiration is not None:
+            due = min(due, expiration.timestamp() + random.uniform(0, self.jitter))
+        with self._condition:
+            # notify() may have brought the wakeup forward during the pass
+            self._due = min(self._due, max(due, now + MIN_INTERVAL))
+
+    def _cleanup(self) -> None:
+        try:
+            expired_count = self.db.delete_expired_media()
+            if expired_count > 0:
+                print(f"Cleaned up {expired_count} expired media entries")
+        except (OSError, IOError) as e:
+            print(f"File system error during cleanup: {str(e)}")
+        except sqlite3.Error as e:
+            print(f"Database error during cleanup: {str(e)}")
+        except RuntimeError as e:
+            print(f"Processing error during cleanup: {str(e)}")
+
+    def _elect(self) -> None:
+        leader = self.db.acquire_lease(LEASE_NAME, self.holder, self.lease_ttl)
+        if leader != self.leader:
+            print("Became the expiry cleanup leader" if leader
+                  else "Lost the expiry cleanup lease")
+        self.leader = leader
+        interval = self.lease_ttl / 3 if leader else self.lease_ttl / 2
+        self._renew_at = time.time() + interval * random.uniform(0.8, 1.0)
+
+    def _wakeup(self) -> float:
+        # Only the leader has cleanup passes to wake up for
+        return min(self._due, self._renew_at) if self.leader else self._renew_at
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped and time.time() < self._wakeup():
+                    self._condition.wait(self._wakeup() - time.time())
+                if self._stopped:
+                    return
+                cleanup_due = time.time() >= self._due
+            self._elect()
+            if not self.leader:
+                continue
+            if cleanup_due:
+                with self._condition:
+                    self._due = float("inf")
+                self._cleanup()
+            self._plan()
@@ -0,0 +1,120 @@
+"""
+NOTICE OF LICENSE.
+
+Copyright 2025 @AnabolicsAnonymous
+
+Licensed under the Affero General Public License v3.0 (AGPL-3.0)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Layout of the upload files under UPLOAD_FOLDER.
+"""
+
+import os
+import re
+from hashlib import blake2b
+from typing import Iterator, Optional
+
+UPLOAD_NAME = re.compile(r"^[0-9a-f]{32}_mediainfo\.\w+$")
+# Number of first-level shard directories, named 00 to ff
+PARTITIONS = 256
+
+
+def _prefix(filename: str) -> str:
+    # Upload names start with a random UUID; hash anything else
+    if UPLOAD_NAME.match(filename):
+        return filename[:4]
+    return blake2b(filename.encode(), digest_size=2).hexdigest()
+
+
+class UploadStore:
+    """Upload files sharded by name prefix, e.g. ab/cd/abcd..._mediainfo.txt.
+
+    Entries store the bare file name and the shard directories are
+    derived from it. Files written before sharding sit directly in the
+    root until `migrate.py uploads` moves them; they are still found and
+    deleted in the meantime.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def relative_path(self, filename: str) -> str:
+        """Path of a file inside the root"""
+        prefix = _prefix(filename)
+        return os.path.join(prefix[:2], prefix[2:], filename)
+
+    def partition(self, filename: str) -> int:
+        """First-level shard directory of a file, from 0 to PARTITIONS - 1"""
+        return int(_prefix(filename)[:2], 16)
+
+    def path(self, filename: str) -> str:
+        """Sharded path a file is written to"""
+        return os.path.join(self.root, self.relative_path(filename))
+
+    def locate(self, filename: str) -> Optional[str]:
+        """Current path of a file, sharded or not yet migrated, or None"""
+        path = self.path(filename)
+        if os.path.exists(path):
+            return path
+        legacy_path = os.path.join(self.root, filename)
+        if os.path.exists(legacy_path):
+            return legacy_path
+        # The migration may have moved the file between the two checks
+        return path if os.path.exists(path) else None
+
+    def write(self, filename: str, text: str, fsync: bool = False) -> str:
+        """Write a file to its shard directory and return its path"""
+        path = self.path(filename)
+        try:
+            f = open(path, "w", encoding="utf-8")
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "w", encoding="utf-8")
+        with f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return path
+
+    def remove(self, filename: str) -> bool:
+        """Delete a file wherever it is; False if there was none"""
+        removed = False
+        # Root first: a file moved by the migration meanwhile is then sharded
+        for path in (os.path.join(self.root, filename), self.path(filename)):
+            try:
+                os.remove(path)
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def scan(self, partition: int) -> Iterator[os.DirEntry]:
+        """Yield the upload files of one first-level shard directory"""
+        try:
+            with os.scandir(os.path.join(self.root, f"{partition:02x}")) as shards:
+                directories = [entry.path for entry in shards if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for directory in directories:
+            with os.scandir(directory) as scan:
+                for entry in scan:
+                    if entry.is_file():
+                        yield entry
+
+    def scan_legacy(self) -> Iterator[os.DirEntry]:
+        """Yield the upload files still stored directly in the root"""
+        with os.scandir(self.root) as scan:
+            for entry in scan:
+                if entry.is_file() and UPLOAD_NAME.match(entry.name):
+                    yield entry
+
+    def adopt(self, filename: str) -> None:
+        """Move a file from the root into its shard directory"""
+        path = self.path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(os.path.join(self.root, filename), path)